@@ -1,13 +1,62 @@
 from __future__ import annotations
 
+import hmac
 import os
-from typing import Dict, Optional
-
-from usuarios import Usuario
+import secrets
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Collection, DefaultDict, Dict, Optional, Tuple
+
+from registros import (
+    OP_TAREA,
+    OP_TAREA_ELIMINADA,
+    OP_USUARIO,
+    EntradaJournal,
+    TareaRecord,
+    UsuarioRecord,
+    tarea_record_desde_legado,
+    usuario_record_desde_legado,
+)
+from usuarios import Usuario, verificar_relleno_async
 from tareas import Tarea
 import utils
 
 
+# Tamaño mínimo del journal antes de considerar una compactación.
+_JOURNAL_MIN_COMPACTAR = 64 * 1024
+
+# Caché de intentos de login fallidos: vida (segundos) y capacidad.
+_FALLOS_TTL = 2.0
+_FALLOS_MAX = 128
+
+# Límite de intentos: tras _LOGIN_MAX_FALLOS fallos de un mismo username
+# dentro de _LOGIN_VENTANA segundos, se rechaza sin calcular el hash
+# hasta que cierre la ventana.
+_LOGIN_MAX_FALLOS = 5
+_LOGIN_VENTANA = 30.0
+
+# Único mensaje para todo login rechazado, exista o no el usuario.
+_CREDENCIALES_INVALIDAS = "Usuario o contraseña incorrectos."
+
+# Roles que pueden crear y asignar tareas.
+_ROLES_GESTION_TAREAS = frozenset({"admin", "supervisor"})
+
+
+def _purgar_vencidos(cache: OrderedDict[str, Tuple[Any, float]], ahora: float) -> None:
+    """
+    Descarta del principio de ``cache`` las entradas vencidas.
+
+    Los valores terminan en su vencimiento y el orden de inserción es el
+    de vencimiento, así que basta con mirar el principio.
+    """
+    while cache:
+        clave, (_, expira) = next(iter(cache.items()))
+        if expira > ahora:
+            break
+        del cache[clave]
+
+
 class GestorTareas:
     """
     Controlador principal del sistema de gestión de tareas.
@@ -15,32 +64,153 @@ class GestorTareas:
     Coordina usuarios, tareas, persistencia y reglas de negocio.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, base_dir: Optional[str] = None) -> None:
         """
         Inicializa el gestor y carga los datos desde disco.
-        Las rutas se calculan automáticamente desde el directorio del proyecto.
+
+        Args:
+            base_dir (Optional[str]): Directorio de los datos. Por defecto,
+                el directorio del proyecto.
         """
-        base_dir = os.path.dirname(os.path.abspath(__file__))
+        if base_dir is None:
+            base_dir = os.path.dirname(os.path.abspath(__file__))
 
         self._usuarios_path = os.path.join(base_dir, "usuarios.dat")
         self._tareas_path = os.path.join(base_dir, "tareas.dat")
-        self._historico_path = os.path.join(base_dir, "tareas_finalizadas.json")
+        self._historico_path = os.path.join(base_dir, "tareas_finalizadas.jsonl")
+        utils.migrar_json_a_jsonl(
+            os.path.join(base_dir, "tareas_finalizadas.json"),
+            self._historico_path,
+        )
+
+        self._journal_path = os.path.join(base_dir, "gestor.log")
+
+        usuarios_rec: Dict[str, UsuarioRecord] = {
+            r.nombre: r
+            for r in utils.cargar_datos(
+                self._usuarios_path, UsuarioRecord, usuario_record_desde_legado
+            )
+        }
+        tareas_rec: Dict[str, TareaRecord] = {
+            r.nombre: r
+            for r in utils.cargar_datos(
+                self._tareas_path, TareaRecord, tarea_record_desde_legado
+            )
+        }
+
+        # Aplica sobre el snapshot los cambios registrados desde la
+        # última compactación.
+        for entrada in utils.leer_journal(self._journal_path, EntradaJournal):
+            if entrada.op == OP_USUARIO:
+                usuarios_rec[entrada.clave] = entrada.usuario
+            elif entrada.op == OP_TAREA:
+                tareas_rec[entrada.clave] = entrada.tarea
+            elif entrada.op == OP_TAREA_ELIMINADA:
+                tareas_rec.pop(entrada.clave, None)
 
         self.usuarios: Dict[str, Usuario] = {
-            u.nombre: u for u in utils.cargar_datos(self._usuarios_path)
+            nombre: Usuario.from_record(r) for nombre, r in usuarios_rec.items()
         }
+
+        usuarios_por_id = {u.id: u for u in self.usuarios.values()}
         self.tareas: Dict[str, Tarea] = {
-            t.nombre: t for t in utils.cargar_datos(self._tareas_path)
+            nombre: Tarea.from_record(r, usuarios_por_id)
+            for nombre, r in tareas_rec.items()
         }
 
+        # Índice secundario: id de usuario -> nombres de sus tareas.
+        # Se usa un dict como conjunto ordenado para conservar el orden
+        # de asignación.
+        self._tareas_por_usuario: DefaultDict[str, Dict[str, None]] = (
+            defaultdict(dict)
+        )
+        for tarea in self.tareas.values():
+            for uid in tarea.usuarios_asignados:
+                self._tareas_por_usuario[uid][tarea.nombre] = None
+
+        # Contadores de estadísticas, actualizados en cada transición.
+        self._stats: Dict[str, int] = utils.calcular_estadisticas_tareas(
+            list(self.tareas.values())
+        )
+
+        # Último intento fallido por usuario: (HMAC del intento, vencimiento).
+        # La clave es aleatoria y propia del proceso, para que el caché no
+        # guarde un hash rápido de contraseñas (a menudo casi correctas).
+        self._fallos_recientes: OrderedDict[str, Tuple[bytes, float]] = (
+            OrderedDict()
+        )
+        self._clave_fallos = secrets.token_bytes(32)
+        # Fallos por username dentro de la ventana: (cantidad, cierre).
+        self._intentos_fallidos: OrderedDict[str, Tuple[int, float]] = (
+            OrderedDict()
+        )
+
+        self._journal = utils.abrir_journal(self._journal_path)
+        self._tam_snapshot = self._calcular_tam_snapshot()
+
     # ==================================================
     # Persistencia
     # ==================================================
 
-    def _guardar_todo(self) -> None:
-        """Guarda usuarios y tareas en disco."""
-        utils.guardar_datos(self._usuarios_path, list(self.usuarios.values()))
-        utils.guardar_datos(self._tareas_path, list(self.tareas.values()))
+    def _persist(
+        self,
+        op: str,
+        clave: str,
+        usuario: Optional[UsuarioRecord] = None,
+        tarea: Optional[TareaRecord] = None,
+    ) -> None:
+        """
+        Registra un único cambio en el journal.
+
+        Compacta cuando el journal supera el doble del snapshot.
+        """
+        utils.escribir_journal(
+            self._journal,
+            EntradaJournal(op=op, clave=clave, usuario=usuario, tarea=tarea),
+        )
+
+        limite = max(2 * self._tam_snapshot, _JOURNAL_MIN_COMPACTAR)
+        if self._journal.tell() > limite:
+            self.compactar()
+
+    def compactar(self) -> None:
+        """
+        Reescribe los snapshots de usuarios y tareas y vacía el journal.
+        """
+        utils.guardar_datos(
+            self._usuarios_path, (u.to_record() for u in self.usuarios.values())
+        )
+        utils.guardar_datos(
+            self._tareas_path, (t.to_record() for t in self.tareas.values())
+        )
+        self._journal.truncate(0)
+        # truncate no mueve la posición: sin el seek, tell() seguiría
+        # informando el tamaño anterior hasta la próxima escritura.
+        self._journal.seek(0)
+        self._tam_snapshot = self._calcular_tam_snapshot()
+
+    def cerrar(self) -> None:
+        """
+        Cierra el journal. El gestor no debe usarse después.
+
+        Cada cambio ya quedó en disco al registrarse, así que no hay nada
+        pendiente que guardar.
+        """
+        self._journal.close()
+
+    def __enter__(self) -> GestorTareas:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.cerrar()
+
+    def _calcular_tam_snapshot(self) -> int:
+        """Devuelve el tamaño en bytes de los snapshots en disco."""
+        return sum(
+            os.path.getsize(p)
+            for p in (self._usuarios_path, self._tareas_path)
+            if os.path.exists(p)
+        )
 
     # ==================================================
     # Usuarios
@@ -70,25 +240,96 @@ class GestorTareas:
         )
 
         self.usuarios[nombre] = usuario
-        self._guardar_todo()
+        self._persist(OP_USUARIO, nombre, usuario=usuario.to_record())
         return usuario
 
-    def autenticar_usuario(self, nombre: str, password: str) -> Usuario:
+    def autenticar_usuario(
+        self,
+        nombre: str,
+        password: str,
+        esperar: Optional[Callable[[Future[bool]], bool]] = None,
+    ) -> Usuario:
         """
         Autentica un usuario por nombre y contraseña.
 
+        Un intento fallido se recuerda durante unos segundos: si se repite
+        la misma contraseña incorrecta se rechaza sin volver a calcular
+        el hash. Tras _LOGIN_MAX_FALLOS fallos en _LOGIN_VENTANA segundos
+        se rechaza todo intento con ese username hasta que cierre la
+        ventana.
+
+        Con un usuario inexistente se verifica igual contra un hash de
+        relleno, y sus fallos se recuerdan y limitan igual: ambos
+        rechazos tardan lo mismo y dan el mismo mensaje.
+
+        La verificación corre en el hilo de hash. Si se indica
+        ``esperar``, se le entrega el Future para que la interfaz lo
+        espere (por ejemplo mostrando un spinner) y devuelva su resultado.
+
         Raises:
-            ValueError: Si las credenciales son inválidas.
+            ValueError: Si las credenciales son inválidas o se superó el
+                límite de intentos.
         """
-        usuario = self.usuarios.get(nombre)
-        if not usuario:
-            raise ValueError("Usuario inexistente.")
+        ahora = time.monotonic()
+        _purgar_vencidos(self._fallos_recientes, ahora)
+        _purgar_vencidos(self._intentos_fallidos, ahora)
 
-        if not usuario.verificar_password(password):
-            raise ValueError("Contraseña incorrecta.")
+        intentos = self._intentos_fallidos.get(nombre)
+        if intentos is not None and intentos[0] >= _LOGIN_MAX_FALLOS:
+            raise ValueError("Demasiados intentos fallidos. Espere unos segundos.")
+
+        usuario = self.usuarios.get(nombre)
+        digest = hmac.new(
+            self._clave_fallos, password.encode("utf-8"), "sha256"
+        ).digest()
+
+        fallo = self._fallos_recientes.get(nombre)
+        if fallo is not None and hmac.compare_digest(fallo[0], digest):
+            self._registrar_fallo(nombre, digest, ahora)
+            raise ValueError(_CREDENCIALES_INVALIDAS)
+
+        if usuario is None:
+            # Se calcula igual un hash, para que el tiempo de respuesta no
+            # revele si el usuario existe.
+            futuro = verificar_relleno_async(password)
+        else:
+            futuro = usuario.verificar_password_async(password)
+        ok = esperar(futuro) if esperar is not None else futuro.result()
+
+        if usuario is None or not ok:
+            self._registrar_fallo(nombre, digest, ahora)
+            raise ValueError(_CREDENCIALES_INVALIDAS)
+
+        self._fallos_recientes.pop(nombre, None)
+        self._intentos_fallidos.pop(nombre, None)
+
+        # Hashes generados con un costo menor al actual se recalculan
+        # aprovechando que se conoce la contraseña.
+        if usuario.necesita_rehash():
+            usuario.cambiar_password(password)
+            self._persist(OP_USUARIO, usuario.nombre, usuario=usuario.to_record())
 
         return usuario
 
+    def _registrar_fallo(self, nombre: str, digest: bytes, ahora: float) -> None:
+        """
+        Recuerda un intento fallido y lo cuenta para el límite de intentos,
+        descartando los registros más antiguos.
+        """
+        self._fallos_recientes.pop(nombre, None)
+        self._fallos_recientes[nombre] = (digest, ahora + _FALLOS_TTL)
+
+        # La ventana se abre con el primer fallo y no se extiende: el
+        # orden de inserción sigue siendo el de vencimiento.
+        cantidad, cierre = self._intentos_fallidos.get(
+            nombre, (0, ahora + _LOGIN_VENTANA)
+        )
+        self._intentos_fallidos[nombre] = (cantidad + 1, cierre)
+
+        for cache in (self._fallos_recientes, self._intentos_fallidos):
+            while len(cache) > _FALLOS_MAX:
+                cache.popitem(last=False)
+
     def resetear_password_usuario(
         self,
         admin: Usuario,
@@ -108,7 +349,9 @@ class GestorTareas:
             raise ValueError("Usuario inexistente.")
 
         usuario.resetear_password()
-        self._guardar_todo()
+        self._fallos_recientes.pop(usuario.nombre, None)
+        self._intentos_fallidos.pop(usuario.nombre, None)
+        self._persist(OP_USUARIO, usuario.nombre, usuario=usuario.to_record())
 
     # ==================================================
     # Tareas
@@ -122,7 +365,7 @@ class GestorTareas:
         Raises:
             ValueError: Si el nombre ya existe.
         """
-        if not (actor.es_admin() or actor.es_supervisor()):
+        if actor.rol not in _ROLES_GESTION_TAREAS:
             raise PermissionError(
                 "Solo administradores o supervisores pueden crear tareas."
             )
@@ -133,7 +376,9 @@ class GestorTareas:
 
         tarea = Tarea(nombre=nombre, descripcion=descripcion)
         self.tareas[nombre] = tarea
-        self._guardar_todo()
+        self._stats["total"] += 1
+        self._stats["pendientes"] += 1
+        self._persist(OP_TAREA, nombre, tarea=tarea.to_record())
         return tarea
 
 
@@ -143,39 +388,41 @@ class GestorTareas:
         nombre_usuario: str,
         nombre_tarea: str,
     ) -> None:
-        if not (actor.es_admin() or actor.es_supervisor()):
+        rol_actor = actor.rol
+        if rol_actor not in _ROLES_GESTION_TAREAS:
             raise PermissionError("No tiene permisos para asignar tareas.")
 
-        usuario = self.usuarios.get(nombre_usuario)
-        tarea = self.tareas.get(nombre_tarea)
-
-        if not usuario or not tarea:
+        if (usuario := self.usuarios.get(nombre_usuario)) is None or (
+            tarea := self.tareas.get(nombre_tarea)
+        ) is None:
             raise ValueError("Usuario o tarea inexistente.")
 
-        if actor.es_supervisor() and usuario.rol != "user":
+        if rol_actor == "supervisor" and usuario.rol != "user":
             raise PermissionError(
                 "Un supervisor solo puede asignar tareas a usuarios comunes."
             )
 
         tarea.agregar_usuario(usuario)
-        self._guardar_todo()
+        self._tareas_por_usuario[usuario.id][tarea.nombre] = None
+        self._persist(OP_TAREA, tarea.nombre, tarea=tarea.to_record())
 
 
     def finalizar_tarea(self, nombre_tarea: str) -> None:
         """
-        Finaliza una tarea y la guarda en el histórico JSON.
+        Finaliza una tarea y la agrega al histórico JSON Lines.
         """
         tarea = self.tareas.get(nombre_tarea)
         if not tarea:
             raise ValueError("Tarea inexistente.")
 
+        if tarea.estado != "finalizada":
+            self._stats["pendientes"] -= 1
+            self._stats["finalizadas"] += 1
         tarea.cambiar_estado("finalizada")
 
-        historico = utils.leer_json(self._historico_path, default=[])
-        historico.append(tarea.obtener_detalle())
-        utils.escribir_json(self._historico_path, historico)
+        utils.agregar_jsonl(self._historico_path, tarea.obtener_detalle())
 
-        self._guardar_todo()
+        self._persist(OP_TAREA, tarea.nombre, tarea=tarea.to_record())
 
     def eliminar_tarea(self, nombre_tarea: str) -> None:
         """
@@ -189,7 +436,11 @@ class GestorTareas:
             raise ValueError("Solo se pueden eliminar tareas finalizadas.")
 
         del self.tareas[nombre_tarea]
-        self._guardar_todo()
+        self._stats["total"] -= 1
+        self._stats["finalizadas"] -= 1
+        for uid in tarea.usuarios_asignados:
+            self._tareas_por_usuario[uid].pop(nombre_tarea, None)
+        self._persist(OP_TAREA_ELIMINADA, nombre_tarea)
 
     # ==================================================
     # Consulta
@@ -211,27 +462,28 @@ class GestorTareas:
         """
         return any(usuario.es_admin() for usuario in self.usuarios.values())
         
-    def listar_usuarios(self) -> list[Usuario]:
+    def listar_usuarios(self) -> Collection[Usuario]:
         """
-        Devuelve la lista de todos los usuarios del sistema.
+        Devuelve todos los usuarios del sistema.
+
+        Es una vista sobre los usuarios del gestor, no una copia.
         """
-        return list(self.usuarios.values())
+        return self.usuarios.values()
 
     def obtener_tareas_de_usuario(self, usuario: Usuario) -> list[Tarea]:
         """
         Devuelve todas las tareas asignadas a un usuario.
         """
         return [
-            tarea
-            for tarea in self.tareas.values()
-            if any(u.id == usuario.id for u in tarea.usuarios_asignados)
+            self.tareas[nombre]
+            for nombre in self._tareas_por_usuario.get(usuario.id, ())
         ]
 
     def obtener_estadisticas(self) -> dict[str, int]:
         """
         Devuelve estadísticas generales de las tareas.
         """
-        return utils.calcular_estadisticas_tareas(list(self.tareas.values()))
+        return dict(self._stats)
 
 
 # ======================================================
@@ -301,5 +553,110 @@ def menu() -> None:
             print(f"Error: {e}")
 
 
+def _tests() -> None:
+    """Tests de persistencia: journal, reapertura y compactación."""
+    import tempfile
+
+    print("=== INICIANDO TESTS DEL GESTOR ===\n")
+
+    with tempfile.TemporaryDirectory() as base:
+        # --------------------------------------------------
+        # Los cambios viven en el journal y se reaplican al reabrir
+        # --------------------------------------------------
+        with GestorTareas(base) as gestor:
+            admin = gestor.crear_usuario("admin", "Admin", "admin", "pw")
+            gestor.crear_tarea("t1", "d", admin)
+            gestor.crear_tarea("t2", "d", admin)
+            gestor.finalizar_tarea("t1")
+            assert not os.path.exists(gestor._tareas_path)
+
+        with GestorTareas(base) as gestor:
+            assert set(gestor.tareas) == {"t1", "t2"}
+            assert gestor.tareas["t1"].estado == "finalizada"
+            assert gestor.autenticar_usuario("admin", "pw").es_admin()
+            print("✔ Journal reaplicado al reabrir")
+
+            # ----------------------------------------------
+            # Compactación seguida de más escrituras
+            # ----------------------------------------------
+            journal_path = gestor._journal_path
+            gestor.compactar()
+            assert os.path.getsize(journal_path) == 0
+            assert gestor._journal.tell() == 0
+            assert os.path.exists(gestor._tareas_path)
+
+            # Baja registrada sobre el snapshot recién escrito
+            gestor.eliminar_tarea("t1")
+            assert gestor._journal.tell() == os.path.getsize(journal_path) > 0
+
+        with GestorTareas(base) as gestor:
+            assert set(gestor.tareas) == {"t2"}
+            assert gestor.obtener_estadisticas() == {
+                "total": 1,
+                "finalizadas": 0,
+                "pendientes": 1,
+            }
+        print("✔ Compactación y baja posterior reaplicada sobre el snapshot")
+
+        # --------------------------------------------------
+        # Entrada final incompleta (escritura interrumpida)
+        # --------------------------------------------------
+        tam_valido = os.path.getsize(journal_path)
+        with open(journal_path, "ab") as f:
+            f.write((100).to_bytes(4, "big") + b"parcial")
+
+        with GestorTareas(base) as gestor:
+            assert os.path.getsize(journal_path) == tam_valido
+            assert set(gestor.tareas) == {"t2"}
+            gestor.crear_tarea("t3", "d", gestor.usuarios["admin"])
+
+        with GestorTareas(base) as gestor:
+            assert set(gestor.tareas) == {"t2", "t3"}
+        print("✔ Entrada incompleta descartada y journal reutilizable")
+
+        # El journal queda cerrado al salir del bloque
+        assert gestor._journal.closed
+
+        # --------------------------------------------------
+        # Fallos de login recordados y límite de intentos
+        # --------------------------------------------------
+        with GestorTareas(base) as gestor:
+            for nombre in ("admin", "fantasma"):
+                for _ in range(_LOGIN_MAX_FALLOS):
+                    try:
+                        gestor.autenticar_usuario(nombre, "mala")
+                        raise AssertionError("Debería haber fallado")
+                    except ValueError as e:
+                        assert str(e) == _CREDENCIALES_INVALIDAS
+                assert gestor._intentos_fallidos[nombre][0] == _LOGIN_MAX_FALLOS
+                try:
+                    gestor.autenticar_usuario(nombre, "pw")
+                    raise AssertionError("Debería haber fallado")
+                except ValueError as e:
+                    assert "Demasiados intentos" in str(e)
+
+            gestor.resetear_password_usuario(gestor.usuarios["admin"], "admin")
+            assert "admin" not in gestor._intentos_fallidos
+            assert "admin" not in gestor._fallos_recientes
+
+            # Al cerrar la ventana se vuelve a verificar
+            gestor._intentos_fallidos["fantasma"] = (_LOGIN_MAX_FALLOS, 0.0)
+            gestor._fallos_recientes["fantasma"] = (b"", 0.0)
+            try:
+                gestor.autenticar_usuario("fantasma", "pw")
+                raise AssertionError("Debería haber fallado")
+            except ValueError as e:
+                assert str(e) == _CREDENCIALES_INVALIDAS
+            assert gestor._intentos_fallidos["fantasma"][0] == 1
+        print("✔ Fallos recordados y límite de intentos por username")
+
+    print("\n=== TODOS LOS TESTS PASARON ✅ ===")
+
+
 if __name__ == "__main__":
-    menu()
+    import sys
+
+    if sys.argv[1:] == ["--test"]:
+        _tests()
+    else:
+        menu()
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import os
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from types import ModuleType
+
+# Costo (log2 de rondas) de bcrypt para hashes nuevos. El valor por
+# defecto mantiene login + cambio de contraseña por debajo de ~500 ms;
+# se puede ajustar por host (ver calibrar_costo_bcrypt).
+BCRYPT_COST = int(os.environ.get("GESTOR_BCRYPT_COST", "10"))
+
+# Parámetros de Argon2id para hashes nuevos (memoria en KiB).
+ARGON2_MEMORY_COST = 65536
+ARGON2_TIME_COST = 3
+ARGON2_PARALLELISM = 2
+
+# Con GESTOR_HASHER=auto se pasa a Argon2id solo si un hash bcrypt al
+# costo configurado tarda al menos esto: por debajo, bcrypt resiste
+# mejor el ataque por GPU con el mismo presupuesto de tiempo.
+AUTO_UMBRAL_S = 1.0
+
+_PREFIJOS_BCRYPT = (b"$2b$", b"$2a$", b"$2y$")
+_PREFIJO_ARGON2ID = b"$argon2id$"
+
+
+# ==========================================================
+# Dependencias (importadas al primer uso)
+# ==========================================================
+
+@lru_cache(maxsize=1)
+def _bcrypt() -> ModuleType:
+    """
+    Importa bcrypt la primera vez que se necesita.
+
+    Los caminos que solo listan usuarios no cargan la extensión C.
+    """
+    import bcrypt
+
+    return bcrypt
+
+
+@lru_cache(maxsize=1)
+def _argon2() -> ModuleType:
+    """
+    Importa argon2-cffi la primera vez que se necesita.
+
+    Raises:
+        RuntimeError: Si argon2-cffi no está instalado.
+    """
+    try:
+        import argon2
+    except ImportError as e:
+        raise RuntimeError(
+            "Argon2id requiere el paquete argon2-cffi."
+        ) from e
+    return argon2
+
+
+def argon2_disponible() -> bool:
+    """Indica si argon2-cffi está instalado."""
+    try:
+        _argon2()
+    except RuntimeError:
+        return False
+    return True
+
+
+# ==========================================================
+# Hashers
+# ==========================================================
+
+class PasswordHasher(ABC):
+    """
+    Algoritmo de hash de contraseñas.
+
+    Recibe la contraseña ya normalizada a bytes (ver usuarios._prep)
+    y produce hashes autodescriptivos: el prefijo identifica el
+    algoritmo y los parámetros van dentro del hash.
+    """
+
+    nombre = ""
+
+    @abstractmethod
+    def hash(self, entrada: bytes) -> bytes:
+        """
+        Calcula el hash de una contraseña.
+
+        Args:
+            entrada (bytes): Contraseña normalizada.
+
+        Returns:
+            bytes: Hash en formato del algoritmo.
+        """
+
+    @abstractmethod
+    def verify(self, entrada: bytes, password_hash: bytes) -> bool:
+        """
+        Verifica una contraseña contra un hash de este algoritmo.
+
+        Args:
+            entrada (bytes): Contraseña normalizada.
+            password_hash (bytes): Hash almacenado.
+
+        Returns:
+            bool: True si coincide.
+        """
+
+    @abstractmethod
+    def necesita_rehash(self, password_hash: bytes) -> bool:
+        """
+        Indica si el hash usa parámetros más débiles que los actuales.
+
+        Args:
+            password_hash (bytes): Hash almacenado.
+
+        Returns:
+            bool: True si conviene recalcularlo.
+        """
+
+
+class BcryptHasher(PasswordHasher):
+    """Hashes bcrypt ($2b$) con costo BCRYPT_COST."""
+
+    nombre = "bcrypt"
+
+    def __init__(self, rounds: int = BCRYPT_COST) -> None:
+        self.rounds = rounds
+
+    def hash(self, entrada: bytes) -> bytes:
+        bcrypt = _bcrypt()
+        return bcrypt.hashpw(entrada, bcrypt.gensalt(rounds=self.rounds))
+
+    def verify(self, entrada: bytes, password_hash: bytes) -> bool:
+        return _bcrypt().checkpw(entrada, password_hash)
+
+    def necesita_rehash(self, password_hash: bytes) -> bool:
+        # Formato bcrypt: $2b$<costo>$<salt+hash>
+        return int(password_hash[4:6]) < self.rounds
+
+
+class Argon2idHasher(PasswordHasher):
+    """Hashes Argon2id mediante argon2-cffi."""
+
+    nombre = "argon2id"
+
+    def __init__(
+        self,
+        memory_cost: int = ARGON2_MEMORY_COST,
+        time_cost: int = ARGON2_TIME_COST,
+        parallelism: int = ARGON2_PARALLELISM,
+    ) -> None:
+        argon2 = _argon2()
+        self._ph = argon2.PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+            type=argon2.Type.ID,
+        )
+
+    def hash(self, entrada: bytes) -> bytes:
+        return self._ph.hash(entrada).encode("ascii")
+
+    def verify(self, entrada: bytes, password_hash: bytes) -> bool:
+        try:
+            return self._ph.verify(password_hash, entrada)
+        except (_argon2().exceptions.VerificationError,
+                _argon2().exceptions.InvalidHashError):
+            return False
+
+    def necesita_rehash(self, password_hash: bytes) -> bool:
+        return self._ph.check_needs_rehash(password_hash.decode("ascii"))
+
+
+# ==========================================================
+# Selección de algoritmo
+# ==========================================================
+
+def calibrar_costo_bcrypt(target_ms: int = 250) -> int:
+    """
+    Busca el mayor costo de bcrypt cuyo hash tarda a lo sumo target_ms.
+
+    Mide bcrypt.hashpw en este host con búsqueda binaria entre 4 y 14.
+    El resultado sirve para definir GESTOR_BCRYPT_COST.
+
+    Args:
+        target_ms (int): Tiempo objetivo por hash, en milisegundos.
+
+    Returns:
+        int: Costo recomendado (mínimo 4).
+    """
+    bajo, alto = 4, 14
+    mejor = bajo
+    while bajo <= alto:
+        medio = (bajo + alto) // 2
+        if _medir_bcrypt(medio) * 1000 <= target_ms:
+            mejor = medio
+            bajo = medio + 1
+        else:
+            alto = medio - 1
+    return mejor
+
+
+def _medir_bcrypt(rounds: int) -> float:
+    """Devuelve los segundos que tarda un hash bcrypt con ese costo."""
+    bcrypt = _bcrypt()
+    inicio = time.perf_counter()
+    bcrypt.hashpw(b"calibracion", bcrypt.gensalt(rounds=rounds))
+    return time.perf_counter() - inicio
+
+
+@lru_cache(maxsize=None)
+def _hasher_por_nombre(nombre: str) -> PasswordHasher:
+    """
+    Instancia (una sola vez) el hasher indicado.
+
+    Raises:
+        ValueError: Si el nombre no corresponde a ningún algoritmo.
+    """
+    if nombre == "bcrypt":
+        return BcryptHasher()
+    if nombre == "argon2id":
+        return Argon2idHasher()
+    if nombre == "auto":
+        if argon2_disponible() and _medir_bcrypt(BCRYPT_COST) >= AUTO_UMBRAL_S:
+            return _hasher_por_nombre("argon2id")
+        return _hasher_por_nombre("bcrypt")
+    raise ValueError(
+        "GESTOR_HASHER debe ser 'bcrypt', 'argon2id' o 'auto'."
+    )
+
+
+def hasher_configurado() -> PasswordHasher:
+    """
+    Hasher para contraseñas nuevas, según GESTOR_HASHER.
+
+    Valores: 'bcrypt' (por defecto), 'argon2id' o 'auto' (Argon2id solo
+    si bcrypt al costo configurado tarda AUTO_UMBRAL_S o más).
+
+    Returns:
+        PasswordHasher: Hasher a usar.
+    """
+    return _hasher_por_nombre(os.environ.get("GESTOR_HASHER", "bcrypt").lower())
+
+
+def hasher_para(password_hash: bytes) -> PasswordHasher:
+    """
+    Devuelve el hasher que corresponde a un hash almacenado.
+
+    Args:
+        password_hash (bytes): Hash almacenado.
+
+    Returns:
+        PasswordHasher: Hasher del algoritmo indicado por el prefijo.
+
+    Raises:
+        ValueError: Si el prefijo no corresponde a un algoritmo conocido.
+    """
+    if password_hash.startswith(_PREFIJOS_BCRYPT):
+        return _hasher_por_nombre("bcrypt")
+    if password_hash.startswith(_PREFIJO_ARGON2ID):
+        return _hasher_por_nombre("argon2id")
+    raise ValueError("Formato de hash de contraseña desconocido.")
+
+
+# ==========================================================
+# Tests y ejemplos de uso
+# ==========================================================
+
+if __name__ == "__main__":
+    import sys
+
+    print("=== INICIANDO TESTS DE HASHERS ===\n")
+
+    # --------------------------------------------------
+    # La clase base no se puede instanciar
+    # --------------------------------------------------
+    try:
+        PasswordHasher()
+        raise AssertionError("Debería haber fallado")
+    except TypeError:
+        print("✔ PasswordHasher es abstracta")
+
+    # --------------------------------------------------
+    # bcrypt
+    # --------------------------------------------------
+    bcrypt_4 = BcryptHasher(rounds=4)
+    h = bcrypt_4.hash(b"clave")
+    assert h.startswith(b"$2b$04$")
+    assert bcrypt_4.verify(b"clave", h)
+    assert not bcrypt_4.verify(b"otra", h)
+    assert not bcrypt_4.necesita_rehash(h)
+    assert BcryptHasher(rounds=5).necesita_rehash(h)
+    print("✔ BcryptHasher: hash, verify y necesita_rehash")
+
+    # --------------------------------------------------
+    # Selección por prefijo
+    # --------------------------------------------------
+    assert hasher_para(h) is _hasher_por_nombre("bcrypt")
+    assert hasher_para(b"$2a$04$" + h[7:]) is _hasher_por_nombre("bcrypt")
+    try:
+        hasher_para(b"$1$md5crypt")
+        raise AssertionError("Debería haber fallado")
+    except ValueError:
+        print("✔ hasher_para elige por prefijo y rechaza formatos desconocidos")
+
+    try:
+        _hasher_por_nombre("md5")
+        raise AssertionError("Debería haber fallado")
+    except ValueError:
+        print("✔ GESTOR_HASHER inválido rechazado")
+
+    assert _hasher_por_nombre("auto").nombre in ("bcrypt", "argon2id")
+    print("✔ GESTOR_HASHER=auto elige un hasher")
+
+    # --------------------------------------------------
+    # Argon2id (si argon2-cffi está instalado)
+    # --------------------------------------------------
+    if argon2_disponible():
+        # Parámetros mínimos para que el test sea rápido.
+        argon = Argon2idHasher(memory_cost=8, time_cost=1, parallelism=1)
+        ha = argon.hash(b"clave")
+        assert ha.startswith(b"$argon2id$")
+        assert argon.verify(b"clave", ha)
+        assert not argon.verify(b"otra", ha)
+        assert not argon.verify(b"clave", b"$argon2id$roto")
+        assert not argon.necesita_rehash(ha)
+        mas_memoria = Argon2idHasher(memory_cost=16, time_cost=1, parallelism=1)
+        assert mas_memoria.necesita_rehash(ha)
+        assert hasher_para(ha) is _hasher_por_nombre("argon2id")
+        print("✔ Argon2idHasher: hash, verify y necesita_rehash")
+    else:
+        print("• argon2-cffi no instalado: se omiten los tests de Argon2id")
+
+    # --------------------------------------------------
+    # Error claro si falta argon2-cffi
+    # --------------------------------------------------
+    _argon2.cache_clear()
+    argon2_real = sys.modules.get("argon2")
+    sys.modules["argon2"] = None  # hace fallar el import
+    try:
+        assert not argon2_disponible()
+        try:
+            Argon2idHasher()
+            raise AssertionError("Debería haber fallado")
+        except RuntimeError:
+            print("✔ Error claro cuando falta argon2-cffi")
+    finally:
+        if argon2_real is None:
+            del sys.modules["argon2"]
+        else:
+            sys.modules["argon2"] = argon2_real
+        _argon2.cache_clear()
+
+    print("\n=== TODOS LOS TESTS PASARON ✅ ===")
@@ -1,16 +1,78 @@
-import os
-from typing import List, Dict, Tuple
+from __future__ import annotations
 
-from rich.console import Console
-from rich.theme import Theme
-from rich.panel import Panel
-from rich.table import Table
-from rich.align import Align
-from rich.prompt import Prompt, Confirm
+import importlib
+import os
+import sys
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from types import ModuleType
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Optional, Tuple
 
 from usuarios import Usuario
 from tareas import Tarea
 
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.panel import Panel
+
+
+def _fecha_corta(d: datetime) -> str:
+    """
+    Formatea una fecha como AAAA-MM-DD.
+
+    Equivale a strftime("%Y-%m-%d") sin interpretar el formato en cada
+    fila de los listados.
+    """
+    return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+
+
+# Contenido estático de los menús: clave -> (título, opciones).
+_MENUS: Dict[str, Tuple[str, List[str]]] = {
+    "admin": (
+        "Menú Administrador",
+        [
+            "1️⃣ Ver usuarios",
+            "2️⃣ Crear usuario",
+            "3️⃣ Resetear password",
+            "4️⃣ Ver estadísticas",
+            "",
+            "0️⃣ Logout",
+        ],
+    ),
+    "supervisor": (
+        "Menú Supervisor",
+        [
+            "1️⃣ Crear tarea",
+            "2️⃣ Asignar tarea a usuario",
+            "",
+            "0️⃣ Logout",
+        ],
+    ),
+    "usuario": (
+        "Menú Usuario",
+        [
+            "1️⃣ Ver mis tareas",
+            "2️⃣ Crear tarea",
+            "3️⃣ Finalizar tarea",
+            "4️⃣ Ver perfil",
+            "",
+            "0️⃣ Logout",
+        ],
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def _rich(modulo: str) -> ModuleType:
+    """
+    Importa un submódulo de rich la primera vez que se necesita.
+
+    Evita pagar el costo de importar rich al cargar este módulo.
+    """
+    return importlib.import_module(f"rich.{modulo}")
+
 
 class InterfazConsola:
     """
@@ -19,35 +81,63 @@ class InterfazConsola:
     """
 
     def __init__(self) -> None:
-        theme = Theme(
-            {
-                "title": "bold blue",
-                "success": "green",
-                "error": "bold red",
-                "warning": "yellow",
-                "info": "cyan",
-            }
+        self._console: Optional[Console] = None
+        self._paneles_menu: Dict[str, Panel] = {}
+        # Las consolas clásicas de Windows (fuera de Windows Terminal)
+        # no interpretan secuencias ANSI: ahí se sigue usando "cls".
+        self._limpiar_con_ansi = not (
+            os.name == "nt" and not os.environ.get("WT_SESSION")
         )
-        self.console = Console(theme=theme)
+
+    @property
+    def console(self) -> Console:
+        """Consola Rich, creada al primer uso."""
+        if self._console is None:
+            theme = _rich("theme").Theme(
+                {
+                    "title": "bold blue",
+                    "success": "green",
+                    "error": "bold red",
+                    "warning": "yellow",
+                    "info": "cyan",
+                }
+            )
+            self._console = _rich("console").Console(theme=theme)
+        return self._console
 
     # ==================================================
     # Utilidades generales
     # ==================================================
 
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        """
+        Acumula la salida de la consola y la escribe de una sola vez.
+
+        Usa el buffer propio de Rich: todo lo impreso dentro del bloque
+        se envía a la terminal con una única escritura al salir. No debe
+        envolver prompts, que se muestran por otra consola.
+        """
+        with self.console:
+            yield
+
     def limpiar_pantalla(self) -> None:
-        os.system("cls" if os.name == "nt" else "clear")
+        if self._limpiar_con_ansi:
+            self.console.clear()
+        else:
+            os.system("cls")
 
     def pausa(self) -> None:
         self.console.print("\n[info]Presione ENTER para continuar...[/info]")
-        Prompt.ask("", default="", show_default=False)
+        _rich("prompt").Prompt.ask("", default="", show_default=False)
 
     # ==================================================
     # Mensajes básicos
     # ==================================================
 
     def mostrar_titulo(self, texto: str) -> None:
-        panel = Panel(
-            Align.center(f"[title]{texto}[/title]"),
+        panel = _rich("panel").Panel(
+            _rich("align").Align.center(f"[title]{texto}[/title]"),
             expand=False,
             border_style="blue",
         )
@@ -68,16 +158,30 @@ class InterfazConsola:
 
     def pedir_credenciales(self) -> Tuple[str, str]:
         self.mostrar_titulo("Login")
-        usuario = Prompt.ask("Usuario")
-        password = Prompt.ask("Contraseña", password=True)
+        usuario = _rich("prompt").Prompt.ask("Usuario")
+        password = _rich("prompt").Prompt.ask("Contraseña", password=True)
         return usuario, password
 
+    def esperar_verificacion(self, futuro: Future[bool]) -> bool:
+        """
+        Muestra un spinner mientras se verifica la contraseña.
+
+        Returns:
+            bool: Resultado de la verificación.
+        """
+        with self.console.status("[info]Verificando credenciales...[/info]"):
+            return futuro.result()
+
     def mostrar_bienvenida(self, usuario: Usuario) -> None:
         texto = (
             f"👋 Bienvenido [bold]{usuario.nombre_visible}[/bold]\n\n"
             f"Rol: [info]{usuario.rol.upper()}[/info]"
         )
-        panel = Panel(Align.center(texto), title="Sesión iniciada", expand=False)
+        panel = _rich("panel").Panel(
+            _rich("align").Align.center(texto),
+            title="Sesión iniciada",
+            expand=False,
+        )
         self.console.print(panel)
 
     def mostrar_asistente_crear_password(self) -> str:
@@ -88,8 +192,8 @@ class InterfazConsola:
         )
 
         while True:
-            pwd1 = Prompt.ask("Nueva contraseña", password=True)
-            pwd2 = Prompt.ask("Repetir contraseña", password=True)
+            pwd1 = _rich("prompt").Prompt.ask("Nueva contraseña", password=True)
+            pwd2 = _rich("prompt").Prompt.ask("Repetir contraseña", password=True)
 
             if pwd1 != pwd2:
                 self.mostrar_error("Las contraseñas no coinciden.")
@@ -103,64 +207,76 @@ class InterfazConsola:
     # Menús
     # ==================================================
 
+    def _panel_menu(self, clave: str) -> Panel:
+        """
+        Devuelve el panel del menú ``clave``, construido una sola vez.
+        """
+        panel = self._paneles_menu.get(clave)
+        if panel is None:
+            titulo, opciones = _MENUS[clave]
+            panel = _rich("panel").Panel(
+                "\n".join(opciones),
+                title=titulo,
+                border_style="blue",
+            )
+            self._paneles_menu[clave] = panel
+        return panel
+
+    def _mostrar_menu(self, clave: str) -> str:
+        # Limpieza y panel salen a la terminal en una sola escritura.
+        with self.batched():
+            self.limpiar_pantalla()
+            self.console.print(self._panel_menu(clave))
+        return self.pedir_opcion()
+
+    def pedir_opcion(self) -> str:
+        """
+        Pide una opción sin redibujar el menú.
+
+        Si el usuario tipeó varias líneas antes de que se procesara la
+        primera, solo cuenta la última.
+        """
+        opcion = _rich("prompt").Prompt.ask("Opción")
+        return self._ultima_linea_pendiente(opcion)
+
+    def _ultima_linea_pendiente(self, opcion: str) -> str:
+        """
+        Consume las líneas ya encoladas en la terminal y devuelve la última.
+
+        Solo aplica a terminales POSIX; en Windows o con la entrada
+        redirigida devuelve ``opcion`` sin leer nada más.
+        """
+        if os.name == "nt" or not sys.stdin.isatty():
+            return opcion
+
+        import select
+
+        fd = sys.stdin.fileno()
+        # En modo canónico cada read devuelve a lo sumo una línea.
+        while select.select([fd], [], [], 0)[0]:
+            linea = os.read(fd, 4096)
+            if not linea:
+                break
+            linea = linea.decode(sys.stdin.encoding or "utf-8", "replace").strip()
+            if linea:
+                opcion = linea
+        return opcion
+
     def mostrar_menu_admin(self) -> str:
-        panel = Panel(
-            "\n".join(
-                [
-                    "1️⃣ Ver usuarios",
-                    "2️⃣ Crear usuario",
-                    "3️⃣ Resetear password",
-                    "4️⃣ Ver estadísticas",
-                    "",
-                    "0️⃣ Logout",
-                ]
-            ),
-            title="Menú Administrador",
-            border_style="blue",
-        )
-        self.console.print(panel)
-        return Prompt.ask("Opción")
+        return self._mostrar_menu("admin")
 
     def mostrar_menu_supervisor(self) -> str:
-        panel = Panel(
-            "\n".join(
-                [
-                    "1️⃣ Crear tarea",
-                    "2️⃣ Asignar tarea a usuario",
-                    "",
-                    "0️⃣ Logout",
-                ]
-            ),
-            title="Menú Supervisor",
-            border_style="blue",
-        )
-        self.console.print(panel)
-        return Prompt.ask("Opción")
+        return self._mostrar_menu("supervisor")
 
     def mostrar_menu_usuario(self) -> str:
-        panel = Panel(
-            "\n".join(
-                [
-                    "1️⃣ Ver mis tareas",
-                    "2️⃣ Crear tarea",
-                    "3️⃣ Finalizar tarea",
-                    "4️⃣ Ver perfil",
-                    "",
-                    "0️⃣ Logout",
-                ]
-            ),
-            title="Menú Usuario",
-            border_style="blue",
-        )
-        self.console.print(panel)
-        return Prompt.ask("Opción")
+        return self._mostrar_menu("usuario")
 
     # ==================================================
     # Usuarios
     # ==================================================
 
-    def mostrar_usuarios(self, usuarios: List[Usuario]) -> None:
-        table = Table(title="Usuarios del sistema", show_lines=True)
+    def mostrar_usuarios(self, usuarios: Iterable[Usuario]) -> None:
+        table = _rich("table").Table(title="Usuarios del sistema", show_lines=True)
         table.add_column("Username")
         table.add_column("Nombre visible")
         table.add_column("Rol")
@@ -171,7 +287,7 @@ class InterfazConsola:
                 u.nombre,
                 u.nombre_visible,
                 u.rol,
-                u.fecha_creacion.strftime("%Y-%m-%d"),
+                _fecha_corta(u.fecha_creacion),
             )
 
         self.console.print(table)
@@ -179,18 +295,21 @@ class InterfazConsola:
     def pedir_datos_nuevo_usuario(self) -> Dict:
         self.mostrar_titulo("Crear usuario")
 
-        nombre = Prompt.ask("Username")
-        visible = Prompt.ask("Nombre visible")
-        rol = Prompt.ask(
+        nombre = _rich("prompt").Prompt.ask("Username")
+        visible = _rich("prompt").Prompt.ask("Nombre visible")
+        rol = _rich("prompt").Prompt.ask(
             "Rol",
             choices=["user", "supervisor", "admin"],
             default="user",
         )
-        tiene_pwd = Confirm.ask("¿Asignar contraseña ahora?", default=False)
+        tiene_pwd = _rich("prompt").Confirm.ask(
+            "¿Asignar contraseña ahora?",
+            default=False,
+        )
 
         password = None
         if tiene_pwd:
-            password = Prompt.ask("Contraseña", password=True)
+            password = _rich("prompt").Prompt.ask("Contraseña", password=True)
 
         return {
             "nombre": nombre,
@@ -200,28 +319,30 @@ class InterfazConsola:
         }
 
     def pedir_usuario_para_reset(self) -> str:
-        return Prompt.ask("Username a resetear")
+        return _rich("prompt").Prompt.ask("Username a resetear")
 
     def pedir_usuario_destino(self) -> str:
-        return Prompt.ask("Usuario destino")
+        return _rich("prompt").Prompt.ask("Usuario destino")
 
     # ==================================================
     # Tareas
     # ==================================================
 
     def mostrar_tareas(self, tareas: List[Tarea]) -> None:
-        table = Table(title="Tareas", show_lines=True)
+        table = _rich("table").Table(title="Tareas", show_lines=True)
         table.add_column("Nombre")
         table.add_column("Estado")
         table.add_column("Creada")
         table.add_column("Usuarios")
 
         for t in tareas:
-            usuarios = ", ".join(u.nombre_visible for u in t.usuarios_asignados)
+            usuarios = ", ".join(
+                u.nombre_visible for u in t.usuarios_asignados.values()
+            )
             table.add_row(
                 t.nombre,
                 t.estado,
-                t.fecha_creacion.strftime("%Y-%m-%d"),
+                _fecha_corta(t.fecha_creacion),
                 usuarios or "-",
             )
 
@@ -229,15 +350,15 @@ class InterfazConsola:
 
     def pedir_datos_nueva_tarea(self) -> Dict:
         self.mostrar_titulo("Crear tarea")
-        nombre = Prompt.ask("Nombre de la tarea")
-        descripcion = Prompt.ask("Descripción")
+        nombre = _rich("prompt").Prompt.ask("Nombre de la tarea")
+        descripcion = _rich("prompt").Prompt.ask("Descripción")
         return {"nombre": nombre, "descripcion": descripcion}
 
     def pedir_tarea_a_finalizar(self) -> str:
-        return Prompt.ask("Nombre de la tarea a finalizar")
+        return _rich("prompt").Prompt.ask("Nombre de la tarea a finalizar")
 
     def pedir_tarea_a_asignar(self) -> str:
-        return Prompt.ask("Nombre de la tarea")
+        return _rich("prompt").Prompt.ask("Nombre de la tarea")
 
     # ==================================================
     # Perfil y estadísticas
@@ -250,11 +371,11 @@ class InterfazConsola:
             f"Rol: {usuario.rol}\n"
             f"Creado: {usuario.fecha_creacion.strftime('%Y-%m-%d %H:%M')}"
         )
-        panel = Panel(texto, title="Perfil", border_style="cyan")
+        panel = _rich("panel").Panel(texto, title="Perfil", border_style="cyan")
         self.console.print(panel)
 
     def mostrar_estadisticas(self, stats: Dict[str, int]) -> None:
-        table = Table(title="Estadísticas de tareas")
+        table = _rich("table").Table(title="Estadísticas de tareas")
         table.add_column("Total")
         table.add_column("Pendientes")
         table.add_column("Finalizadas")
@@ -1,4 +1,5 @@
 import sys
+from typing import Callable, Dict
 
 from gestor_tareas import GestorTareas
 from interfaz_consola import InterfazConsola
@@ -45,7 +46,11 @@ def flujo_login(ui: InterfazConsola, gestor: GestorTareas) -> Usuario:
         usuario, password = ui.pedir_credenciales()
 
         try:
-            usuario_autenticado = gestor.autenticar_usuario(usuario, password)
+            usuario_autenticado = gestor.autenticar_usuario(
+                usuario,
+                password,
+                esperar=ui.esperar_verificacion,
+            )
 
             # Primer login sin contraseña
             if usuario_autenticado.password_hash is None:
@@ -68,143 +73,189 @@ def flujo_login(ui: InterfazConsola, gestor: GestorTareas) -> Usuario:
 
 
 # ==================================================
-# Menús
+# Acciones de menú
 # ==================================================
 
-def menu_admin(
+Accion = Callable[[InterfazConsola, GestorTareas, Usuario], None]
+
+
+def _admin_ver_usuarios(
     ui: InterfazConsola,
     gestor: GestorTareas,
     usuario: Usuario,
 ) -> None:
-    while True:
+    with ui.batched():
         ui.limpiar_pantalla()
-        opcion = ui.mostrar_menu_admin()
+        ui.mostrar_usuarios(gestor.listar_usuarios())
+    ui.pausa()
 
-        try:
-            if opcion == "1":
-                ui.limpiar_pantalla()
-                ui.mostrar_usuarios(gestor.listar_usuarios())
-                ui.pausa()
 
-            elif opcion == "2":
-                ui.limpiar_pantalla()
-                datos = ui.pedir_datos_nuevo_usuario()
-                gestor.crear_usuario(**datos)
-                ui.mostrar_exito("Usuario creado correctamente.")
-                ui.pausa()
+def _admin_crear_usuario(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    ui.limpiar_pantalla()
+    datos = ui.pedir_datos_nuevo_usuario()
+    gestor.crear_usuario(**datos)
+    ui.mostrar_exito("Usuario creado correctamente.")
+    ui.pausa()
 
-            elif opcion == "3":
-                ui.limpiar_pantalla()
-                nombre = ui.pedir_usuario_para_reset()
-                gestor.resetear_password_usuario(usuario, nombre)
-                ui.mostrar_exito("Contraseña reseteada.")
-                ui.pausa()
 
-            elif opcion == "4":
-                ui.limpiar_pantalla()
-                stats = gestor.obtener_estadisticas()
-                ui.mostrar_estadisticas(stats)
-                ui.pausa()
+def _admin_resetear_password(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    ui.limpiar_pantalla()
+    nombre = ui.pedir_usuario_para_reset()
+    gestor.resetear_password_usuario(usuario, nombre)
+    ui.mostrar_exito("Contraseña reseteada.")
+    ui.pausa()
 
-            elif opcion == "0":
-                return
 
-            else:
-                ui.mostrar_advertencia("Opción inválida.")
-                ui.pausa()
+def _admin_ver_estadisticas(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    stats = gestor.obtener_estadisticas()
+    with ui.batched():
+        ui.limpiar_pantalla()
+        ui.mostrar_estadisticas(stats)
+    ui.pausa()
 
-        except (ValueError, PermissionError) as e:
-            ui.mostrar_error(str(e))
-            ui.pausa()
-        except Exception as e:
-            ui.mostrar_error(f"Error inesperado: {e}")
-            ui.pausa()
+
+def _supervisor_crear_tarea(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    ui.limpiar_pantalla()
+    datos = ui.pedir_datos_nueva_tarea()
+    gestor.crear_tarea(actor=usuario, **datos)
+    ui.mostrar_exito("Tarea creada correctamente.")
+    ui.pausa()
 
 
-def menu_supervisor(
+def _supervisor_asignar_tarea(
     ui: InterfazConsola,
     gestor: GestorTareas,
     usuario: Usuario,
 ) -> None:
-    while True:
-        ui.limpiar_pantalla()
-        opcion = ui.mostrar_menu_supervisor()
+    ui.limpiar_pantalla()
+    nombre_usuario = ui.pedir_usuario_destino()
+    nombre_tarea = ui.pedir_tarea_a_asignar()
+    gestor.asignar_usuario_tarea(
+        usuario,
+        nombre_usuario,
+        nombre_tarea,
+    )
+    ui.mostrar_exito("Tarea asignada correctamente.")
+    ui.pausa()
 
-        try:
-            if opcion == "1":
-                ui.limpiar_pantalla()
-                datos = ui.pedir_datos_nueva_tarea()
-                tarea = gestor.crear_tarea(usuario, **datos)
-                ui.mostrar_exito("Tarea creada correctamente.")
-                ui.pausa()
 
-            elif opcion == "2":
-                ui.limpiar_pantalla()
-                nombre_usuario = ui.pedir_usuario_destino()
-                nombre_tarea = ui.pedir_tarea_a_asignar()
-                gestor.asignar_usuario_tarea(
-                    usuario,
-                    nombre_usuario,
-                    nombre_tarea,
-                )
-                ui.mostrar_exito("Tarea asignada correctamente.")
-                ui.pausa()
+def _usuario_ver_tareas(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    tareas = gestor.obtener_tareas_de_usuario(usuario)
+    with ui.batched():
+        ui.limpiar_pantalla()
+        ui.mostrar_tareas(tareas)
+    ui.pausa()
 
-            elif opcion == "0":
-                return
 
-            else:
-                ui.mostrar_advertencia("Opción inválida.")
-                ui.pausa()
+def _usuario_crear_tarea(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    ui.limpiar_pantalla()
+    datos = ui.pedir_datos_nueva_tarea()
+    tarea = gestor.crear_tarea(actor=usuario, **datos)
+    gestor.asignar_usuario_tarea(usuario, usuario.nombre, tarea.nombre)
+    ui.mostrar_exito("Tarea creada y asignada.")
+    ui.pausa()
 
-        except (ValueError, PermissionError) as e:
-            ui.mostrar_error(str(e))
-            ui.pausa()
+
+def _usuario_finalizar_tarea(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    ui.limpiar_pantalla()
+    nombre = ui.pedir_tarea_a_finalizar()
+    gestor.finalizar_tarea(nombre)
+    ui.mostrar_exito("Tarea finalizada.")
+    ui.pausa()
 
 
-def menu_usuario(
+def _usuario_ver_perfil(
     ui: InterfazConsola,
     gestor: GestorTareas,
     usuario: Usuario,
 ) -> None:
-    while True:
+    with ui.batched():
         ui.limpiar_pantalla()
-        opcion = ui.mostrar_menu_usuario()
+        ui.mostrar_perfil(usuario)
+    ui.pausa()
 
-        try:
-            if opcion == "1":
-                ui.limpiar_pantalla()
-                tareas = gestor.obtener_tareas_de_usuario(usuario)
-                ui.mostrar_tareas(tareas)
-                ui.pausa()
 
-            elif opcion == "2":
-                ui.limpiar_pantalla()
-                datos = ui.pedir_datos_nueva_tarea()
-                tarea = gestor.crear_tarea(**datos)
-                gestor.asignar_usuario_tarea(usuario.nombre, tarea.nombre)
-                ui.mostrar_exito("Tarea creada y asignada.")
-                ui.pausa()
+_ADMIN_HANDLERS: Dict[str, Accion] = {
+    "1": _admin_ver_usuarios,
+    "2": _admin_crear_usuario,
+    "3": _admin_resetear_password,
+    "4": _admin_ver_estadisticas,
+}
 
-            elif opcion == "3":
-                ui.limpiar_pantalla()
-                nombre = ui.pedir_tarea_a_finalizar()
-                gestor.finalizar_tarea(nombre)
-                ui.mostrar_exito("Tarea finalizada.")
-                ui.pausa()
+_SUPERVISOR_HANDLERS: Dict[str, Accion] = {
+    "1": _supervisor_crear_tarea,
+    "2": _supervisor_asignar_tarea,
+}
 
-            elif opcion == "4":
-                ui.limpiar_pantalla()
-                ui.mostrar_perfil(usuario)
-                ui.pausa()
+_USUARIO_HANDLERS: Dict[str, Accion] = {
+    "1": _usuario_ver_tareas,
+    "2": _usuario_crear_tarea,
+    "3": _usuario_finalizar_tarea,
+    "4": _usuario_ver_perfil,
+}
 
-            elif opcion == "0":
-                return
 
-            else:
-                ui.mostrar_advertencia("Opción inválida.")
-                ui.pausa()
+# ==================================================
+# Menús
+# ==================================================
+
+def _bucle_menu(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+    mostrar_menu: Callable[[], str],
+    handlers: Dict[str, Accion],
+) -> None:
+    """
+    Muestra un menú y despacha la opción elegida hasta que se elija "0".
+
+    Los errores de una acción se informan sin salir del menú. Una opción
+    inválida solo muestra el aviso: el menú sigue en pantalla, así que
+    se vuelve a pedir la opción sin redibujarlo.
+    """
+    redibujar = True
+    while True:
+        opcion = mostrar_menu() if redibujar else ui.pedir_opcion()
+        redibujar = True
+        if opcion == "0":
+            return
+
+        handler = handlers.get(opcion)
+        if handler is None:
+            ui.mostrar_advertencia("Opción inválida.")
+            redibujar = False
+            continue
 
+        try:
+            handler(ui, gestor, usuario)
         except (ValueError, PermissionError) as e:
             ui.mostrar_error(str(e))
             ui.pausa()
@@ -213,6 +264,32 @@ def menu_usuario(
             ui.pausa()
 
 
+def menu_admin(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    _bucle_menu(ui, gestor, usuario, ui.mostrar_menu_admin, _ADMIN_HANDLERS)
+
+
+def menu_supervisor(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    _bucle_menu(
+        ui, gestor, usuario, ui.mostrar_menu_supervisor, _SUPERVISOR_HANDLERS
+    )
+
+
+def menu_usuario(
+    ui: InterfazConsola,
+    gestor: GestorTareas,
+    usuario: Usuario,
+) -> None:
+    _bucle_menu(ui, gestor, usuario, ui.mostrar_menu_usuario, _USUARIO_HANDLERS)
+
+
 # ==================================================
 # Main
 # ==================================================
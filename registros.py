@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+import msgspec
+
+
+# ==========================================================
+# Registros de persistencia
+# ==========================================================
+
+class UsuarioRecord(msgspec.Struct):
+    """
+    Registro persistible de un Usuario.
+
+    Refleja los atributos del objeto de dominio tal como se guardan
+    en disco (msgpack).
+    """
+
+    id: str
+    nombre: str
+    nombre_visible: str
+    rol: str
+    fecha_creacion: datetime
+    password_hash: Optional[bytes] = None
+    # Registros anteriores a este campo usan el esquema 1 (sin pre-hash).
+    hash_version: int = 1
+
+
+class ComentarioRecord(msgspec.Struct, array_like=True):
+    """
+    Registro persistible de un comentario de tarea.
+
+    El autor se guarda por id y se resuelve al reconstruir la tarea.
+    """
+
+    texto: str
+    autor_id: str
+    fecha: datetime
+
+
+class TareaRecord(msgspec.Struct):
+    """
+    Registro persistible de una Tarea.
+
+    Los usuarios asignados se guardan por id para que, al cargar,
+    la tarea referencie las mismas instancias que el gestor.
+    """
+
+    nombre: str
+    descripcion: str
+    estado: str
+    fecha_creacion: datetime
+    usuarios_asignados: List[str] = []
+    comentarios: List[ComentarioRecord] = []
+
+
+# ==========================================================
+# Journal de cambios
+# ==========================================================
+
+OP_USUARIO = "usuario"
+OP_TAREA = "tarea"
+OP_TAREA_ELIMINADA = "tarea_eliminada"
+
+
+class EntradaJournal(msgspec.Struct, array_like=True):
+    """
+    Cambio individual registrado en el journal del gestor.
+
+    ``op`` indica el tipo de cambio y ``clave`` el nombre afectado.
+    Las altas y modificaciones llevan el registro completo en
+    ``usuario`` o ``tarea``; las bajas solo la clave.
+    """
+
+    op: str
+    clave: str
+    usuario: Optional[UsuarioRecord] = None
+    tarea: Optional[TareaRecord] = None
+
+
+# ==========================================================
+# Migración desde el formato pickle
+# ==========================================================
+
+def usuario_record_desde_legado(obj: object) -> UsuarioRecord:
+    """
+    Convierte un usuario deserializado del formato pickle a registro.
+
+    Args:
+        obj (object): Objeto con los atributos de un Usuario.
+
+    Returns:
+        UsuarioRecord: Registro equivalente.
+    """
+    return UsuarioRecord(
+        id=obj.id,
+        nombre=obj.nombre,
+        nombre_visible=obj.nombre_visible,
+        rol=obj.rol,
+        fecha_creacion=obj.fecha_creacion,
+        password_hash=obj.password_hash,
+    )
+
+
+def tarea_record_desde_legado(obj: object) -> TareaRecord:
+    """
+    Convierte una tarea deserializada del formato pickle a registro.
+
+    Args:
+        obj (object): Objeto con los atributos de una Tarea.
+
+    Returns:
+        TareaRecord: Registro equivalente.
+    """
+    return TareaRecord(
+        nombre=obj.nombre,
+        descripcion=obj.descripcion,
+        estado=obj.estado,
+        fecha_creacion=obj.fecha_creacion,
+        usuarios_asignados=[u.id for u in obj.usuarios_asignados],
+        comentarios=[
+            ComentarioRecord(texto=texto, autor_id=autor.id, fecha=fecha)
+            for texto, autor, fecha in obj.comentarios
+        ],
+    )
+
+
+# ==========================================================
+# Tests y ejemplos de uso
+# ==========================================================
+
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    print("=== INICIANDO TESTS DE REGISTROS ===\n")
+
+    ahora = datetime.now()
+
+    # --------------------------------------------------
+    # Ida y vuelta por msgpack
+    # --------------------------------------------------
+    usuario = UsuarioRecord(
+        id="u1",
+        nombre="ana",
+        nombre_visible="Ana",
+        rol="user",
+        fecha_creacion=ahora,
+        password_hash=b"$2b$04$hash",
+        hash_version=2,
+    )
+    tarea = TareaRecord(
+        nombre="t1",
+        descripcion="d",
+        estado="pendiente",
+        fecha_creacion=ahora,
+        usuarios_asignados=["u1"],
+        comentarios=[ComentarioRecord(texto="hola", autor_id="u1", fecha=ahora)],
+    )
+
+    for entrada in (
+        EntradaJournal(op=OP_USUARIO, clave="ana", usuario=usuario),
+        EntradaJournal(op=OP_TAREA, clave="t1", tarea=tarea),
+        EntradaJournal(op=OP_TAREA_ELIMINADA, clave="t1"),
+    ):
+        datos = msgspec.msgpack.encode(entrada)
+        assert msgspec.msgpack.decode(datos, type=EntradaJournal) == entrada
+    print("✔ EntradaJournal ida y vuelta por msgpack")
+
+    # Registros viejos sin hash_version se leen con el esquema 1
+    viejo = msgspec.msgpack.encode(
+        {
+            "id": "u1",
+            "nombre": "ana",
+            "nombre_visible": "Ana",
+            "rol": "user",
+            "fecha_creacion": ahora,
+        }
+    )
+    leido = msgspec.msgpack.decode(viejo, type=UsuarioRecord)
+    assert leido.hash_version == 1
+    assert leido.password_hash is None
+    print("✔ Registro sin hash_version usa el esquema 1")
+
+    # --------------------------------------------------
+    # Migración desde objetos del formato pickle
+    # --------------------------------------------------
+    autor = SimpleNamespace(
+        id="u1",
+        nombre="ana",
+        nombre_visible="Ana",
+        rol="user",
+        fecha_creacion=ahora,
+        password_hash=None,
+    )
+    legado = SimpleNamespace(
+        nombre="t1",
+        descripcion="d",
+        estado="pendiente",
+        fecha_creacion=ahora,
+        usuarios_asignados=[autor],
+        comentarios=[("hola", autor, ahora)],
+    )
+
+    assert usuario_record_desde_legado(autor).nombre == "ana"
+    migrada = tarea_record_desde_legado(legado)
+    assert migrada.usuarios_asignados == ["u1"]
+    assert migrada.comentarios == [
+        ComentarioRecord(texto="hola", autor_id="u1", fecha=ahora)
+    ]
+    print("✔ Conversión desde el formato pickle")
+
+    print("\n=== TODOS LOS TESTS PASARON ✅ ===")
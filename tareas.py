@@ -5,14 +5,27 @@ from datetime import datetime
 from typing import List, Tuple, Dict, Any
 import json
 
+from registros import ComentarioRecord, TareaRecord
 from usuarios import Usuario
 
+# Estados válidos de una tarea.
+ESTADOS = frozenset({"pendiente", "finalizada"})
+
 
 class Tarea:
     """
     Representa una tarea dentro de un sistema de gestión.
     """
 
+    __slots__ = (
+        "nombre",
+        "descripcion",
+        "estado",
+        "fecha_creacion",
+        "usuarios_asignados",
+        "comentarios",
+    )
+
     def __init__(
         self,
         nombre: str,
@@ -26,6 +39,7 @@ class Tarea:
             nombre (str): Nombre o título de la tarea.
             descripcion (str): Descripción detallada.
             usuarios_asignados (List[Usuario] | None): Usuarios asignados.
+                Se guardan indexados por id, en orden de asignación.
         """
         if not nombre:
             raise ValueError("El nombre de la tarea no puede estar vacío.")
@@ -34,7 +48,9 @@ class Tarea:
         self.descripcion: str = descripcion
         self.estado: str = "pendiente"
         self.fecha_creacion: datetime = datetime.now()
-        self.usuarios_asignados: List[Usuario] = usuarios_asignados or []
+        self.usuarios_asignados: Dict[str, Usuario] = {
+            u.id: u for u in usuarios_asignados or ()
+        }
         self.comentarios: List[Tuple[str, Usuario, datetime]] = []
 
     # -------------------------
@@ -45,21 +61,19 @@ class Tarea:
         """
         Agrega un usuario a la tarea.
         """
-        if usuario not in self.usuarios_asignados:
-            self.usuarios_asignados.append(usuario)
+        self.usuarios_asignados.setdefault(usuario.id, usuario)
 
     def quitar_usuario(self, usuario: Usuario) -> None:
         """
         Quita un usuario de la tarea.
         """
-        if usuario in self.usuarios_asignados:
-            self.usuarios_asignados.remove(usuario)
+        self.usuarios_asignados.pop(usuario.id, None)
 
     def cambiar_estado(self, nuevo_estado: str) -> None:
         """
         Cambia el estado de la tarea.
         """
-        if nuevo_estado not in ("pendiente", "finalizada"):
+        if nuevo_estado not in ESTADOS:
             raise ValueError("El estado debe ser 'pendiente' o 'finalizada'.")
         self.estado = nuevo_estado
 
@@ -70,7 +84,7 @@ class Tarea:
         Raises:
             ValueError: Si el autor no está asignado a la tarea.
         """
-        if autor not in self.usuarios_asignados:
+        if autor.id not in self.usuarios_asignados:
             raise ValueError("El autor debe ser un usuario asignado a la tarea.")
 
         self.comentarios.append((texto, autor, datetime.now()))
@@ -89,7 +103,7 @@ class Tarea:
             "estado": self.estado,
             "fecha_creacion": self.fecha_creacion.isoformat(),
             "usuarios_asignados": [
-                usuario.to_dict() for usuario in self.usuarios_asignados
+                usuario.to_dict() for usuario in self.usuarios_asignados.values()
             ],
             "comentarios": [
                 {
@@ -116,7 +130,7 @@ class Tarea:
         if not self.usuarios_asignados:
             lineas.append("  - Ninguno")
         else:
-            for u in self.usuarios_asignados:
+            for u in self.usuarios_asignados.values():
                 lineas.append(f"  - {u}")
 
         lineas.append("\n💬 Comentarios:")
@@ -136,6 +150,54 @@ class Tarea:
     # Serialización
     # -------------------------
 
+    def to_record(self) -> TareaRecord:
+        """
+        Convierte la tarea a su registro de persistencia.
+        """
+        return TareaRecord(
+            nombre=self.nombre,
+            descripcion=self.descripcion,
+            estado=self.estado,
+            fecha_creacion=self.fecha_creacion,
+            usuarios_asignados=list(self.usuarios_asignados),
+            comentarios=[
+                ComentarioRecord(texto=texto, autor_id=autor.id, fecha=fecha)
+                for texto, autor, fecha in self.comentarios
+            ],
+        )
+
+    @classmethod
+    def from_record(
+        cls,
+        record: TareaRecord,
+        usuarios_por_id: Dict[str, Usuario],
+    ) -> Tarea:
+        """
+        Reconstruye una tarea desde su registro de persistencia.
+
+        Los ids de usuarios se resuelven contra ``usuarios_por_id``;
+        los que ya no existen se descartan.
+        """
+        tarea = cls(
+            nombre=record.nombre,
+            descripcion=record.descripcion,
+            usuarios_asignados=[
+                usuarios_por_id[uid]
+                for uid in record.usuarios_asignados
+                if uid in usuarios_por_id
+            ],
+        )
+
+        tarea.estado = record.estado
+        tarea.fecha_creacion = record.fecha_creacion
+
+        for c in record.comentarios:
+            autor = usuarios_por_id.get(c.autor_id)
+            if autor is not None:
+                tarea.comentarios.append((c.texto, autor, c.fecha))
+
+        return tarea
+
     def to_json(self) -> str:
         """
         Serializa la tarea a JSON.
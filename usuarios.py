@@ -1,17 +1,178 @@
 from __future__ import annotations
 
-import bcrypt
+import binascii
+import hashlib
+import hmac
 import json
+import secrets
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
 from uuid import uuid4
 
+from hashers import calibrar_costo_bcrypt, hasher_configurado, hasher_para
+from registros import UsuarioRecord
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: se usa json como respaldo
+    orjson = None
+
+# Versión del esquema de hash de contraseñas:
+# 1 = hash(password), 2 = hash(hex(sha256(password))), con el hasher
+# indicado por el prefijo del hash (ver hashers.py).
+HASH_VERSION = 2
+
+# Roles válidos del sistema.
+ROLES = frozenset({"user", "supervisor", "admin"})
+
+
+# Bits de rol: es_admin/es_supervisor prueban un int en vez de
+# comparar strings.
+_USER = 1
+_SUPERVISOR = 2
+_ADMIN = 4
+
+_BIT_POR_ROL: Dict[str, int] = {
+    "user": _USER,
+    "supervisor": _SUPERVISOR,
+    "admin": _ADMIN,
+}
+
+# Atributos que forman parte de to_dict.
+_CAMPOS_DICT = frozenset(
+    {
+        "id",
+        "nombre",
+        "nombre_visible",
+        "rol",
+        "fecha_creacion",
+        "password_hash",
+        "hash_version",
+    }
+)
+
+# Verificaciones exitosas recientes, indexadas por (hash almacenado,
+# HMAC de la contraseña) con su vencimiento. Los fallos no se guardan
+# acá: los recuerda y limita GestorTareas.autenticar_usuario. La clave del HMAC es aleatoria
+# y vive solo en este proceso: un volcado de memoria no expone un hash
+# rápido de la contraseña para atacar offline.
+_VERIFICACION_CLAVE = secrets.token_bytes(32)
+_VERIFICACION_CACHE: OrderedDict[Tuple[bytes, bytes], float] = OrderedDict()
+_VERIFICACION_CACHE_MAX = 128
+_VERIFICACION_TTL = 60.0
+
+
+# Hilo dedicado al hash de contraseñas: bcrypt y argon2-cffi liberan el
+# GIL, así que la interfaz puede seguir dibujando mientras se verifica.
+_HASH_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hasher")
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> bytes:
+    """
+    Hash de relleno para verificar usuarios sin contraseña.
+
+    Se genera una sola vez, al primer uso, con el mismo algoritmo y
+    costo que los hashes nuevos, para que ambos caminos tarden lo mismo.
+    """
+    return hasher_configurado().hash(b"x")
+
+
+def _prep(crudo: bytes) -> bytes:
+    """
+    Normaliza la contraseña (en UTF-8) antes de pasarla al hasher.
+
+    Devuelve el SHA-256 en hexadecimal (64 bytes ASCII): evita el
+    truncado silencioso de bcrypt a 72 bytes y da una entrada de
+    longitud fija.
+    """
+    return binascii.hexlify(hashlib.sha256(crudo).digest())
+
+
+def _huella(crudo: bytes) -> bytes:
+    """HMAC-SHA256 de la contraseña con la clave del proceso."""
+    return hmac.new(_VERIFICACION_CLAVE, crudo, "sha256").digest()
+
+
+def _verificar_cached(entrada: bytes, password_hash: bytes, huella: bytes) -> bool:
+    """
+    Verifica con el hasher del hash almacenado, recordando las
+    verificaciones exitosas durante _VERIFICACION_TTL segundos.
+
+    Verificar dos veces la contraseña correcta contra el mismo hash en
+    un mismo proceso resuelve la segunda vez sin recalcular el hash.
+
+    Args:
+        entrada (bytes): Contraseña normalizada que recibe el hasher.
+        password_hash (bytes): Hash almacenado.
+        huella (bytes): HMAC de la contraseña (ver _huella), usado como clave.
+    """
+    ahora = time.monotonic()
+
+    # Las entradas se guardan en orden de inserción, y por lo tanto de
+    # vencimiento: basta con descartar desde el principio.
+    while _VERIFICACION_CACHE:
+        clave_vieja, expira = next(iter(_VERIFICACION_CACHE.items()))
+        if expira > ahora:
+            break
+        del _VERIFICACION_CACHE[clave_vieja]
+
+    clave = (password_hash, huella)
+    if clave in _VERIFICACION_CACHE:
+        return True
+
+    resultado = hasher_para(password_hash).verify(entrada, password_hash)
+    if resultado:
+        _VERIFICACION_CACHE[clave] = ahora + _VERIFICACION_TTL
+        if len(_VERIFICACION_CACHE) > _VERIFICACION_CACHE_MAX:
+            _VERIFICACION_CACHE.popitem(last=False)
+    return resultado
+
+
+def verificar_relleno_async(password: str) -> Future[bool]:
+    """
+    Verifica la contraseña contra el hash de relleno en el hilo de hash.
+
+    Permite que un login con un usuario inexistente tarde lo mismo que
+    uno con contraseña incorrecta. El resultado es siempre False.
+
+    Args:
+        password (str): Contraseña ingresada.
+
+    Returns:
+        Future[bool]: False cuando termina la verificación.
+    """
+
+    def _verificar() -> bool:
+        crudo = password.encode("utf-8")
+        entrada = _prep(crudo)
+        _verificar_cached(entrada, _dummy_hash(), _huella(crudo))
+        return False
+
+    return _HASH_POOL.submit(_verificar)
+
 
 class Usuario:
     """
     Representa un usuario del sistema con autenticación segura.
     """
 
+    __slots__ = (
+        "id",
+        "nombre",
+        "nombre_visible",
+        "rol",
+        "_mascara",
+        "fecha_creacion",
+        "password_hash",
+        "hash_version",
+        "_dict_cache",
+    )
+
     def __init__(
         self,
         nombre: str,
@@ -35,8 +196,8 @@ class Usuario:
         if not nombre:
             raise ValueError("El nombre de usuario no puede estar vacío.")
 
-        if rol not in ("user", "supervisor", "admin"):
-            raise ValueError("El rol debe ser 'user', 'supervisor' o 'admin'.")
+        # Último resultado de to_dict; None si hay que recalcularlo.
+        self._dict_cache: Optional[Dict[str, Any]] = None
 
         self.id: str = user_id or str(uuid4())
         self.nombre: str = nombre
@@ -45,9 +206,25 @@ class Usuario:
         self.fecha_creacion: datetime = fecha_creacion or datetime.now()
 
         self.password_hash: Optional[bytes] = None
+        self.hash_version: int = HASH_VERSION
         if password is not None:
             self.cambiar_password(password)
 
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        # Asignar el rol valida el nombre y actualiza la máscara de bits.
+        # El string se interna para que todos los usuarios con el mismo
+        # rol compartan una única instancia.
+        if nombre == "rol":
+            if valor not in ROLES:
+                raise ValueError("El rol debe ser 'user', 'supervisor' o 'admin'.")
+            valor = sys.intern(valor)
+            object.__setattr__(self, "_mascara", _BIT_POR_ROL[valor])
+        # Cualquier escritura de un campo serializado descarta el
+        # resultado memorizado de to_dict.
+        if nombre in _CAMPOS_DICT:
+            object.__setattr__(self, "_dict_cache", None)
+        object.__setattr__(self, nombre, valor)
+
     # -------------------------
     # Seguridad y autenticación
     # -------------------------
@@ -60,15 +237,37 @@ class Usuario:
             password (str): Contraseña a verificar.
 
         Returns:
-            bool: True si es correcta, False si no.
-
-        Raises:
-            ValueError: Si el usuario no tiene contraseña configurada.
+            bool: True si es correcta, False si no o si el usuario no
+                tiene contraseña configurada.
         """
-        if self.password_hash is None:
-            raise ValueError("El usuario no tiene contraseña configurada.")
+        # Siempre se ejecuta el hasher (contra un hash de relleno si no hay
+        # contraseña) para que el tiempo de respuesta no revele si el
+        # usuario tiene contraseña configurada.
+        tiene_password = self.password_hash is not None
+        target = self.password_hash if tiene_password else _dummy_hash()
+        # Una sola codificación por verificación, compartida por la clave
+        # de caché y la entrada al hasher.
+        crudo = password.encode("utf-8")
+        huella = _huella(crudo)
+        if tiene_password and self.hash_version < 2:
+            entrada = crudo
+        else:
+            entrada = _prep(crudo)
+        ok = _verificar_cached(entrada, target, huella) and tiene_password
+
+        return hmac.compare_digest(b"1" if ok else b"0", b"1")
+
+    def verificar_password_async(self, password: str) -> Future[bool]:
+        """
+        Verifica la contraseña en el hilo de hash.
+
+        Args:
+            password (str): Contraseña a verificar.
 
-        return bcrypt.checkpw(password.encode("utf-8"), self.password_hash)
+        Returns:
+            Future[bool]: Resultado de verificar_password.
+        """
+        return _HASH_POOL.submit(self.verificar_password, password)
 
     def cambiar_password(self, nueva_password: str) -> None:
         """
@@ -83,17 +282,52 @@ class Usuario:
         if not nueva_password:
             raise ValueError("La contraseña no puede estar vacía.")
 
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(
-            nueva_password.encode("utf-8"),
-            salt,
+        _VERIFICACION_CACHE.clear()
+
+        self.password_hash = hasher_configurado().hash(
+            _prep(nueva_password.encode("utf-8"))
         )
+        self.hash_version = HASH_VERSION
+
+    def necesita_rehash(self) -> bool:
+        """
+        Indica si el hash almacenado usa un esquema anterior a
+        HASH_VERSION, otro algoritmo que el configurado o parámetros
+        más débiles que los actuales.
+
+        Returns:
+            bool: True si conviene recalcular el hash en el próximo login.
+        """
+        if self.password_hash is None:
+            return False
+        if self.hash_version < HASH_VERSION:
+            return True
+        actual = hasher_configurado()
+        if hasher_para(self.password_hash) is not actual:
+            return True
+        return actual.necesita_rehash(self.password_hash)
+
+    @classmethod
+    def calibrate_cost(cls, target_ms: int = 250) -> int:
+        """
+        Busca el mayor costo de bcrypt cuyo hash tarda a lo sumo target_ms.
+
+        Ver hashers.calibrar_costo_bcrypt.
+
+        Args:
+            target_ms (int): Tiempo objetivo por hash, en milisegundos.
+
+        Returns:
+            int: Costo recomendado (mínimo 4).
+        """
+        return calibrar_costo_bcrypt(target_ms)
 
     def resetear_password(self) -> None:
         """
         Resetea la contraseña del usuario (la deja en None).
         Usado para recuperación de contraseña.
         """
+        _VERIFICACION_CACHE.clear()
         self.password_hash = None
 
     # -------------------------
@@ -107,7 +341,7 @@ class Usuario:
         Returns:
             bool: True si es admin.
         """
-        return self.rol == "admin"
+        return self._mascara & _ADMIN != 0
     
     def es_supervisor(self) -> bool:
         """
@@ -116,12 +350,11 @@ class Usuario:
         Returns:
             bool: True si es supervisor.
         """
-        return self.rol == "supervisor"
+        return self._mascara & _SUPERVISOR != 0
 
     def tiene_rol(self, *roles: str) -> bool:
         return self.rol in roles
 
-
     # -------------------------
     # Serialización
     # -------------------------
@@ -130,9 +363,18 @@ class Usuario:
         """
         Serializa el usuario a un diccionario.
 
+        El resultado se recuerda hasta que se asigna alguno de sus
+        campos (ver __setattr__); cada llamada devuelve una copia.
+
         Returns:
             Dict[str, Any]: Representación serializable del usuario.
         """
+        if self._dict_cache is None:
+            self._dict_cache = self._armar_dict()
+        return dict(self._dict_cache)
+
+    def _armar_dict(self) -> Dict[str, Any]:
+        """Construye el diccionario que devuelve to_dict."""
         return {
             "id": self.id,
             "nombre": self.nombre,
@@ -141,7 +383,11 @@ class Usuario:
             "password_hash": self.password_hash.decode("utf-8")
             if self.password_hash is not None
             else None,
-            "fecha_creacion": self.fecha_creacion.isoformat(),
+            # Microsegundos exactos expresados en ns; el float de
+            # timestamp() no alcanza para ns directos.
+            "fecha_creacion_ns": round(self.fecha_creacion.timestamp() * 1e6)
+            * 1000,
+            "hash_version": self.hash_version,
         }
 
     @classmethod
@@ -155,18 +401,65 @@ class Usuario:
         Returns:
             Usuario: Instancia reconstruida.
         """
+        if "fecha_creacion_ns" in data:
+            fecha = datetime.fromtimestamp(data["fecha_creacion_ns"] // 1000 / 1e6)
+        else:
+            # Formato anterior: fecha en ISO 8601.
+            fecha = datetime.fromisoformat(data["fecha_creacion"])
+
         usuario = cls(
             nombre=data["nombre"],
             nombre_visible=data["nombre_visible"],
             rol=data["rol"],
             password=None,
             user_id=data["id"],
-            fecha_creacion=datetime.fromisoformat(data["fecha_creacion"]),
+            fecha_creacion=fecha,
         )
 
         if data["password_hash"] is not None:
             usuario.password_hash = data["password_hash"].encode("utf-8")
+        usuario.hash_version = data.get("hash_version", 1)
+
+        return usuario
 
+    def to_record(self) -> UsuarioRecord:
+        """
+        Convierte el usuario a su registro de persistencia.
+
+        Returns:
+            UsuarioRecord: Registro msgspec del usuario.
+        """
+        return UsuarioRecord(
+            id=self.id,
+            nombre=self.nombre,
+            nombre_visible=self.nombre_visible,
+            rol=self.rol,
+            fecha_creacion=self.fecha_creacion,
+            password_hash=self.password_hash,
+            hash_version=self.hash_version,
+        )
+
+    @classmethod
+    def from_record(cls, record: UsuarioRecord) -> Usuario:
+        """
+        Crea un usuario a partir de su registro de persistencia.
+
+        Args:
+            record (UsuarioRecord): Registro decodificado.
+
+        Returns:
+            Usuario: Instancia reconstruida.
+        """
+        usuario = cls(
+            nombre=record.nombre,
+            nombre_visible=record.nombre_visible,
+            rol=record.rol,
+            password=None,
+            user_id=record.id,
+            fecha_creacion=record.fecha_creacion,
+        )
+        usuario.password_hash = record.password_hash
+        usuario.hash_version = record.hash_version
         return usuario
 
     def to_json(self) -> str:
@@ -176,6 +469,10 @@ class Usuario:
         Returns:
             str: JSON del usuario.
         """
+        if orjson is not None:
+            return orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2).decode(
+                "utf-8"
+            )
         return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
 
     @classmethod
@@ -189,7 +486,8 @@ class Usuario:
         Returns:
             Usuario: Instancia reconstruida.
         """
-        return cls.from_dict(json.loads(data))
+        loads = orjson.loads if orjson is not None else json.loads
+        return cls.from_dict(loads(data))
 
     # -------------------------
     # Representación
@@ -219,12 +517,10 @@ if __name__ == "__main__":
     assert not usuario.es_admin()
     assert not usuario.es_supervisor()
 
-    # Forzar error al verificar sin password
-    try:
-        usuario.verificar_password("1234")
-        raise AssertionError("Debería haber fallado")
-    except ValueError:
-        print("✔ Error correcto al verificar sin contraseña")
+    # Sin contraseña la verificación falla, incluso con la del relleno
+    assert usuario.verificar_password("1234") is False
+    assert usuario.verificar_password("x") is False
+    print("✔ Verificación sin contraseña rechazada")
 
     # Asignar contraseña
     usuario.cambiar_password("secreta123")
@@ -234,6 +530,14 @@ if __name__ == "__main__":
     assert usuario.verificar_password("otra") is False
     print("✔ Verificación de contraseña correcta")
 
+    # El caché de verificación no guarda el SHA-256 sin sal de la contraseña
+    claves_cache = [huella for _, huella in _VERIFICACION_CACHE]
+    assert claves_cache
+    assert hashlib.sha256(b"secreta123").digest() not in claves_cache
+    assert _huella(b"secreta123") in claves_cache
+    assert _huella(b"otra") not in claves_cache
+    print("✔ Caché de verificación indexado por HMAC, solo aciertos")
+
     # Resetear contraseña
     usuario.resetear_password()
     print("✔ Contraseña reseteada")
@@ -282,4 +586,45 @@ if __name__ == "__main__":
 
     print("✔ Serialización y deserialización correctas")
 
+    # --------------------------------------------------
+    # Rehash entre esquemas y algoritmos
+    # --------------------------------------------------
+    import os
+    from hashers import argon2_disponible
+
+    assert not admin.necesita_rehash()
+    admin.hash_version = 1
+    assert admin.necesita_rehash()
+    admin.cambiar_password("admin123")
+    assert not admin.necesita_rehash()
+
+    if argon2_disponible():
+        hasher_previo = os.environ.get("GESTOR_HASHER")
+        os.environ["GESTOR_HASHER"] = "argon2id"
+        try:
+            assert admin.necesita_rehash()
+            admin.cambiar_password("admin123")
+            assert admin.password_hash.startswith(b"$argon2id$")
+            assert admin.verificar_password("admin123") is True
+            assert not admin.necesita_rehash()
+        finally:
+            if hasher_previo is None:
+                del os.environ["GESTOR_HASHER"]
+            else:
+                os.environ["GESTOR_HASHER"] = hasher_previo
+        # De vuelta a bcrypt: el hash Argon2id pide rehash pero sigue
+        # verificando.
+        assert admin.necesita_rehash()
+        assert admin.verificar_password("admin123") is True
+        print("✔ necesita_rehash detecta cambio de algoritmo")
+    print("✔ necesita_rehash detecta esquemas anteriores")
+
+    # to_dict se memoriza, pero cualquier asignación lo invalida
+    assert admin.to_dict()["nombre_visible"] == "Administrador"
+    admin.nombre_visible = "Admin"
+    assert admin.to_dict()["nombre_visible"] == "Admin"
+    usuario_copiado.password_hash = None
+    assert usuario_copiado.to_dict()["password_hash"] is None
+    print("✔ to_dict memorizado se invalida al modificar el usuario")
+
     print("\n=== TODOS LOS TESTS PASARON ✅ ===")
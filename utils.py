@@ -1,55 +1,250 @@
 from __future__ import annotations
 
+import hmac
+import io
 import json
+import os
 import pickle
 import secrets
 import string
-from typing import Any, List, Optional, TypeVar, Dict
+from functools import lru_cache
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    TypeVar,
+)
+
+import msgspec
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: se usa json como respaldo
+    orjson = None
 
 T = TypeVar("T")
 
+# Cabecera de los archivos .dat. El último byte es la versión de formato:
+# los archivos sin cabecera corresponden al formato pickle original.
+FORMATO_DATOS_VERSION = 2
+_CABECERA = b"GTD" + bytes([FORMATO_DATOS_VERSION])
+
+_ENCODER = msgspec.msgpack.Encoder()
+
 # ==========================================================
 # Persistencia
 # ==========================================================
 
-def cargar_datos(path: str, default: Optional[List[T]] = None) -> List[T]:
+def cargar_datos(
+    path: str,
+    tipo: Type[T],
+    desde_legado: Optional[Callable[[Any], T]] = None,
+    default: Optional[List[T]] = None,
+) -> List[T]:
     """
-    Carga datos desde un archivo binario usando pickle.
+    Carga una lista de registros msgspec desde un archivo binario.
+
+    Si el archivo no tiene la cabecera del formato actual se asume que
+    fue escrito con pickle: se convierte con ``desde_legado`` y se
+    reescribe una única vez en el formato nuevo.
 
     Args:
         path (str): Ruta del archivo.
+        tipo (Type[T]): Clase msgspec.Struct de los registros.
+        desde_legado (Optional[Callable[[Any], T]]): Conversor de objetos pickle.
         default (Optional[List[T]]): Valor por defecto si el archivo no existe.
 
     Returns:
-        List[T]: Lista de objetos cargados o el valor por defecto.
+        List[T]: Lista de registros cargados o el valor por defecto.
     """
     if default is None:
         default = []
 
     try:
         with open(path, "rb") as f:
-            return pickle.load(f)
+            contenido = f.read()
     except FileNotFoundError:
         return default
     except Exception as e:
         raise RuntimeError(f"Error al cargar datos desde {path}") from e
 
+    try:
+        if contenido.startswith(_CABECERA):
+            return _decoder(tipo).decode(contenido[len(_CABECERA):])
+
+        if desde_legado is None:
+            raise ValueError("Formato de archivo desconocido.")
+
+        registros = [desde_legado(obj) for obj in _cargar_pickle_legado(contenido)]
+    except Exception as e:
+        raise RuntimeError(f"Error al cargar datos desde {path}") from e
+
+    guardar_datos(path, registros)
+    return registros
 
-def guardar_datos(path: str, data: List[Any]) -> None:
+
+def guardar_datos(path: str, data: Iterable[Any]) -> None:
     """
-    Guarda datos en un archivo binario usando pickle.
+    Guarda registros msgspec en un archivo binario (msgpack).
+
+    Los registros se codifican a medida que se iteran, sin armar una
+    lista intermedia.
 
     Args:
         path (str): Ruta del archivo.
-        data (List[Any]): Lista de objetos a guardar.
+        data (Iterable[Any]): Registros a guardar.
     """
     try:
-        with open(path, "wb") as f:
-            pickle.dump(data, f)
+        buffer = bytearray()
+        cantidad = 0
+        for registro in data:
+            _ENCODER.encode_into(registro, buffer, len(buffer))
+            cantidad += 1
+
+        _escribir_atomico(
+            path, _CABECERA + _cabecera_array_msgpack(cantidad) + buffer
+        )
     except Exception as e:
         raise RuntimeError(f"Error al guardar datos en {path}") from e
 
 
+def _escribir_atomico(path: str, contenido: bytes) -> None:
+    """
+    Reemplaza el archivo de forma atómica.
+
+    Escribe en ``path + ".tmp"`` con una única escritura, fuerza los
+    datos a disco y renombra sobre el destino con os.replace. Si el
+    proceso se interrumpe, el archivo original queda intacto.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "wb", buffering=1 << 20) as f:
+        f.write(contenido)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _cabecera_array_msgpack(cantidad: int) -> bytes:
+    """Devuelve la cabecera msgpack de un array de ``cantidad`` elementos."""
+    if cantidad < 16:
+        return bytes([0x90 | cantidad])
+    if cantidad < 1 << 16:
+        return b"\xdc" + cantidad.to_bytes(2, "big")
+    return b"\xdd" + cantidad.to_bytes(4, "big")
+
+
+def abrir_journal(path: str) -> BinaryIO:
+    """
+    Abre (o crea) un journal binario en modo append.
+
+    Args:
+        path (str): Ruta del journal.
+
+    Returns:
+        BinaryIO: Archivo abierto para agregar entradas.
+    """
+    try:
+        return open(path, "ab")
+    except Exception as e:
+        raise RuntimeError(f"Error al abrir el journal {path}") from e
+
+
+def escribir_journal(journal: BinaryIO, entrada: Any) -> None:
+    """
+    Agrega una entrada msgspec al journal y la fuerza a disco.
+
+    Cada entrada se guarda como un entero de 4 bytes con su longitud
+    seguido del msgpack de la entrada.
+
+    Args:
+        journal (BinaryIO): Journal abierto con abrir_journal.
+        entrada (Any): Registro msgspec a agregar.
+    """
+    data = _ENCODER.encode(entrada)
+    try:
+        journal.write(len(data).to_bytes(4, "big") + data)
+        journal.flush()
+        os.fsync(journal.fileno())
+    except Exception as e:
+        raise RuntimeError(f"Error al escribir en el journal {journal.name}") from e
+
+
+def leer_journal(path: str, tipo: Type[T]) -> List[T]:
+    """
+    Lee todas las entradas de un journal.
+
+    Una entrada final incompleta (escritura interrumpida) se descarta y
+    se trunca del archivo, para que las próximas entradas queden legibles.
+
+    Args:
+        path (str): Ruta del journal.
+        tipo (Type[T]): Clase msgspec.Struct de las entradas.
+
+    Returns:
+        List[T]: Entradas en el orden en que fueron escritas.
+    """
+    try:
+        with open(path, "rb") as f:
+            contenido = f.read()
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        raise RuntimeError(f"Error al leer el journal {path}") from e
+
+    decoder = msgspec.msgpack.Decoder(tipo)
+    entradas: List[T] = []
+    pos = 0
+    fin = len(contenido)
+
+    try:
+        while pos + 4 <= fin:
+            largo = int.from_bytes(contenido[pos:pos + 4], "big")
+            if pos + 4 + largo > fin:
+                break
+            entradas.append(decoder.decode(contenido[pos + 4:pos + 4 + largo]))
+            pos += 4 + largo
+
+        if pos < fin:
+            os.truncate(path, pos)
+    except Exception as e:
+        raise RuntimeError(f"Error al leer el journal {path}") from e
+
+    return entradas
+
+
+@lru_cache(maxsize=None)
+def _decoder(tipo: Type[T]) -> msgspec.msgpack.Decoder:
+    """Devuelve (y reutiliza) el decoder msgpack para una lista de ``tipo``."""
+    return msgspec.msgpack.Decoder(List[tipo])
+
+
+class _ObjetoLegado:
+    """Contenedor de atributos para objetos leídos del formato pickle."""
+
+
+class _UnpicklerLegado(pickle.Unpickler):
+    """
+    Unpickler que reconstruye las clases del dominio como simples
+    contenedores de atributos, sin depender de su implementación actual.
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module in ("usuarios", "tareas"):
+            return _ObjetoLegado
+        return super().find_class(module, name)
+
+
+def _cargar_pickle_legado(contenido: bytes) -> List[Any]:
+    """Deserializa el contenido de un archivo escrito con pickle."""
+    return _UnpicklerLegado(io.BytesIO(contenido)).load()
+
+
 def leer_json(path: str, default: Optional[Any] = None) -> Any:
     """
     Lee datos desde un archivo JSON.
@@ -65,8 +260,11 @@ def leer_json(path: str, default: Optional[Any] = None) -> Any:
         default = []
 
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            contenido = f.read()
+        if orjson is not None:
+            return orjson.loads(contenido)
+        return json.loads(contenido)
     except FileNotFoundError:
         return default
     except Exception as e:
@@ -82,12 +280,87 @@ def escribir_json(path: str, data: Any) -> None:
         data (Any): Datos serializables a JSON.
     """
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            contenido = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        else:
+            contenido = json.dumps(data, ensure_ascii=False, indent=2).encode(
+                "utf-8"
+            )
+        _escribir_atomico(path, contenido)
     except Exception as e:
         raise RuntimeError(f"Error al escribir JSON en {path}") from e
 
 
+def _linea_jsonl(data: Any) -> bytes:
+    """Serializa un objeto como una línea JSON Lines (con salto final)."""
+    if orjson is not None:
+        return orjson.dumps(data) + b"\n"
+    return json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def agregar_jsonl(path: str, data: Any) -> None:
+    """
+    Agrega un objeto como una línea al final de un archivo JSON Lines.
+
+    Args:
+        path (str): Ruta del archivo.
+        data (Any): Datos serializables a JSON.
+    """
+    try:
+        linea = _linea_jsonl(data)
+        with open(path, "ab") as f:
+            f.write(linea)
+    except Exception as e:
+        raise RuntimeError(f"Error al escribir JSON Lines en {path}") from e
+
+
+def leer_jsonl(path: str) -> Iterator[Any]:
+    """
+    Itera los objetos de un archivo JSON Lines, línea por línea.
+
+    Args:
+        path (str): Ruta del archivo.
+
+    Yields:
+        Any: Objeto de cada línea no vacía.
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+
+    try:
+        with open(path, "rb") as f:
+            for linea in f:
+                if linea.strip():
+                    yield loads(linea)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        raise RuntimeError(f"Error al leer JSON Lines desde {path}") from e
+
+
+def migrar_json_a_jsonl(path_json: str, path_jsonl: str) -> None:
+    """
+    Convierte una lista JSON a JSON Lines y elimina el archivo original.
+
+    El JSON Lines se escribe completo de forma atómica. No hace nada si
+    el archivo JSON no existe, ni si el JSON Lines ya existe (la
+    migración ya se hizo): así nunca se duplica el histórico.
+
+    Args:
+        path_json (str): Ruta del archivo JSON (lista de objetos).
+        path_jsonl (str): Ruta del archivo JSON Lines de destino.
+    """
+    if not os.path.exists(path_json) or os.path.exists(path_jsonl):
+        return
+
+    items = leer_json(path_json, default=[])
+    try:
+        _escribir_atomico(path_jsonl, b"".join(_linea_jsonl(i) for i in items))
+    except Exception as e:
+        raise RuntimeError(f"Error al migrar {path_json} a JSON Lines") from e
+
+    os.remove(path_json)
+
+
 # ==========================================================
 # Seguridad
 # ==========================================================
@@ -124,6 +397,9 @@ def buscar_usuario_por_nombre(usuarios: List[Any], nombre: str) -> Optional[Any]
     """
     Busca un usuario por nombre (username).
 
+    Los nombres se comparan en tiempo constante para no filtrar, por
+    tiempo de respuesta, cuánto de un username coincide.
+
     Args:
         usuarios (List[Any]): Lista de usuarios.
         nombre (str): Nombre a buscar.
@@ -131,8 +407,12 @@ def buscar_usuario_por_nombre(usuarios: List[Any], nombre: str) -> Optional[Any]
     Returns:
         Optional[Any]: Usuario encontrado o None.
     """
+    buscado = nombre.encode("utf-8")
     for usuario in usuarios:
-        if getattr(usuario, "nombre", None) == nombre:
+        actual = getattr(usuario, "nombre", None)
+        if isinstance(actual, str) and hmac.compare_digest(
+            actual.encode("utf-8"), buscado
+        ):
             return usuario
     return None
 
@@ -221,11 +501,73 @@ if __name__ == "__main__":
     assert u.nombre == "alice"
     print("✔ Búsqueda de usuario OK")
 
-    # Test persistencia pickle
-    path = "test.pkl"
-    guardar_datos(path, usuarios)
-    usuarios_cargados = cargar_datos(path)
+    # Test persistencia msgpack
+    class FakeRecord(msgspec.Struct):
+        nombre: str
+
+    path = "test.dat"
+    guardar_datos(path, [FakeRecord(u.nombre) for u in usuarios])
+    usuarios_cargados = cargar_datos(path, FakeRecord)
     assert len(usuarios_cargados) == 2
-    print("✔ Persistencia pickle OK")
+    assert usuarios_cargados[0].nombre == "alice"
+    print("✔ Persistencia msgpack OK")
+
+    # Test journal
+    journal_path = "test.log"
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    assert leer_journal(journal_path, FakeRecord) == []
+
+    journal = abrir_journal(journal_path)
+    escribir_journal(journal, FakeRecord("uno"))
+    escribir_journal(journal, FakeRecord("dos"))
+    tam_valido = journal.tell()
+    # Escritura interrumpida: el largo promete más bytes de los que hay
+    journal.write((50).to_bytes(4, "big") + b"xx")
+    journal.close()
+
+    entradas = leer_journal(journal_path, FakeRecord)
+    assert [e.nombre for e in entradas] == ["uno", "dos"]
+    assert os.path.getsize(journal_path) == tam_valido
+
+    journal = abrir_journal(journal_path)
+    escribir_journal(journal, FakeRecord("tres"))
+    journal.close()
+    entradas = leer_journal(journal_path, FakeRecord)
+    assert [e.nombre for e in entradas] == ["uno", "dos", "tres"]
+    os.remove(journal_path)
+    print("✔ Journal: lectura, descarte de entrada incompleta y append OK")
+
+    # Test JSON Lines
+    jsonl_path = "test.jsonl"
+    json_path = "test_historico.json"
+    for p in (jsonl_path, json_path):
+        if os.path.exists(p):
+            os.remove(p)
+    assert list(leer_jsonl(jsonl_path)) == []
+
+    agregar_jsonl(jsonl_path, {"nombre": "t1", "estado": "finalizada"})
+    agregar_jsonl(jsonl_path, {"nombre": "ñandú"})
+    assert list(leer_jsonl(jsonl_path)) == [
+        {"nombre": "t1", "estado": "finalizada"},
+        {"nombre": "ñandú"},
+    ]
+    os.remove(jsonl_path)
+    print("✔ JSON Lines: agregar y leer OK")
+
+    # Test migración JSON -> JSON Lines
+    historico = [{"nombre": "a"}, {"nombre": "b"}]
+    escribir_json(json_path, historico)
+    migrar_json_a_jsonl(json_path, jsonl_path)
+    assert not os.path.exists(json_path)
+    assert list(leer_jsonl(jsonl_path)) == historico
+
+    # Repetirla (p. ej. el .json reapareció tras un corte) no duplica
+    escribir_json(json_path, historico)
+    migrar_json_a_jsonl(json_path, jsonl_path)
+    assert list(leer_jsonl(jsonl_path)) == historico
+    os.remove(json_path)
+    os.remove(jsonl_path)
+    print("✔ Migración JSON -> JSON Lines atómica e idempotente")
 
     print("\n=== TODOS LOS TESTS PASARON ✅ ===")